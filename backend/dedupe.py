@@ -0,0 +1,123 @@
+"""Duplicate and near-duplicate location detection.
+
+Candidates come from a ``$nearSphere`` query on the 2dsphere-indexed ``geo``
+field, so a check only ever compares a handful of nearby locations. Names
+are compared on normalized character trigrams, which tolerates typos,
+accents, punctuation and word order ("Café Le Petit Jardin" vs
+"le petit jardin cafe").
+"""
+import math
+import re
+import time
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+# Same normalized name this close together is the same place
+EXACT_RADIUS_M = 30
+# Similar names within this radius are offered as merge candidates
+CANDIDATE_RADIUS_M = 150
+MERGE_SIMILARITY = 0.5
+MAX_CANDIDATES = 20
+
+# Any run of non-letters and non-digits, in any script
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def geo_point(latitude: float, longitude: float) -> Dict:
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def normalize_name(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return " ".join(sorted(_NON_WORD.sub(" ", stripped).split()))
+
+
+def trigrams(normalized: str) -> set:
+    padded = "  " + normalized + " "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of the trigram sets of the normalized names."""
+    na, nb = normalize_name(a), normalize_name(b)
+    if not na or not nb:
+        # Nothing left to compare, e.g. a name made only of punctuation
+        return 0.0
+    ta, tb = trigrams(na), trigrams(nb)
+    return len(ta & tb) / len(ta | tb)
+
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(a))
+
+
+def _nearby_query(latitude: float, longitude: float, radius_m: float) -> Dict:
+    return {"geo": {"$nearSphere": {
+        "$geometry": geo_point(latitude, longitude),
+        "$maxDistance": radius_m,
+    }}}
+
+
+def compare(location: Dict, other: Dict) -> Optional[Dict]:
+    """Classify ``other`` against ``location``; None when unrelated."""
+    distance = distance_m(location["latitude"], location["longitude"], other["latitude"], other["longitude"])
+    similarity = name_similarity(location["name"], other["name"])
+    normalized = normalize_name(location["name"])
+    exact = distance <= EXACT_RADIUS_M and bool(normalized) and normalized == normalize_name(other["name"])
+    if not exact and similarity < MERGE_SIMILARITY:
+        return None
+    return {
+        "id": str(other["_id"]),
+        "name": other["name"],
+        "address": other.get("address"),
+        "distance_m": round(distance, 1),
+        "similarity": round(similarity, 2),
+        "exact": exact,
+    }
+
+
+async def find_duplicates(db, location: Dict) -> List[Dict]:
+    """Existing locations that ``location`` duplicates, closest first."""
+    nearby = db.locations.find(
+        _nearby_query(location["latitude"], location["longitude"], CANDIDATE_RADIUS_M),
+        {"name": 1, "address": 1, "latitude": 1, "longitude": 1},
+    ).limit(MAX_CANDIDATES)
+
+    matches = []
+    async for other in nearby:
+        if other["_id"] == location.get("_id"):
+            continue
+        match = compare(location, other)
+        if match:
+            matches.append(match)
+    return matches
+
+
+async def scan_duplicates(db, time_budget_s: float, after=None) -> Tuple[List[Dict], int, Optional[str]]:
+    """Scan the collection for duplicate pairs within a time budget.
+
+    Locations are walked in ``_id`` order and each is only paired with
+    neighbours that sort after it, so every pair is reported once. Returns
+    ``(pairs, scanned, resume_after)``; pass ``resume_after`` back as
+    ``after`` to continue, it is None once the whole collection was scanned.
+    """
+    deadline = time.monotonic() + time_budget_s
+    query = {"_id": {"$gt": after}} if after is not None else {}
+    cursor = db.locations.find(query, {"name": 1, "address": 1, "latitude": 1, "longitude": 1}).sort("_id", 1)
+
+    pairs, scanned = [], 0
+    async for location in cursor:
+        for match in await find_duplicates(db, location):
+            if match["id"] > str(location["_id"]):
+                pairs.append({"id": str(location["_id"]), "name": location["name"], "duplicate": match})
+        scanned += 1
+        # Checked after each location so every call makes progress
+        if time.monotonic() >= deadline:
+            await cursor.close()
+            return pairs, scanned, str(location["_id"])
+    return pairs, scanned, None
@@ -0,0 +1,145 @@
+"""Change-stream driven event bus.
+
+A background task watches ``locations``, ``reviews`` and ``saved_locations``
+and hands batches of change events to registered projectors (see
+projectors.py). The resume token is stored in ``derived_state`` after each
+batch has been handled, so a restart continues where the last run stopped.
+
+Only one worker consumes the stream at a time. Workers compete for a lease
+in ``derived_state`` and the holder renews it while it runs; if it dies,
+another worker takes over once the lease expires.
+
+Change streams need MongoDB running as a replica set.
+"""
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = ("locations", "reviews", "saved_locations")
+
+STATE_ID = "event_bus"
+BATCH_SIZE = 100
+LEASE_SECONDS = 30
+RETRY_SECONDS = 5
+
+
+class EventBus:
+    def __init__(self, db, projectors: List, max_await_ms: int = 1000):
+        self.db = db
+        self.projectors = projectors
+        self.max_await_ms = max_await_ms
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._task = None
+        self.is_leader = False
+        self.batches = 0
+        self.events = 0
+        self.errors = 0
+        self.last_event_at = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.is_leader:
+            await self.db.derived_state.update_one(
+                {"_id": STATE_ID, "owner": self.owner}, {"$set": {"lease_until": datetime.utcnow()}}
+            )
+
+    async def _acquire_lease(self) -> bool:
+        # Imported here so importing the app doesn't load pymongo before the client exists
+        from pymongo.errors import DuplicateKeyError
+
+        now = datetime.utcnow()
+        try:
+            await self.db.derived_state.update_one(
+                {"_id": STATE_ID, "$or": [{"owner": self.owner}, {"lease_until": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "lease_until": now + timedelta(seconds=LEASE_SECONDS)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Someone else holds an unexpired lease
+            return False
+        return True
+
+    async def _resume_token(self):
+        state = await self.db.derived_state.find_one({"_id": STATE_ID}, {"resume_token": 1})
+        return state.get("resume_token") if state else None
+
+    async def _run(self):
+        while True:
+            try:
+                self.is_leader = await self._acquire_lease()
+                if self.is_leader:
+                    await self._consume()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The stored token is untouched, so the failed batch is replayed on retry
+                self.errors += 1
+                logger.exception("Event bus failed, retrying in %ss", RETRY_SECONDS)
+            await asyncio.sleep(RETRY_SECONDS)
+
+    async def _consume(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": list(WATCHED_COLLECTIONS)}}}]
+        async with self.db.watch(
+            pipeline,
+            full_document="updateLookup",
+            resume_after=await self._resume_token(),
+            max_await_time_ms=self.max_await_ms
+        ) as stream:
+            while True:
+                batch = []
+                while len(batch) < BATCH_SIZE:
+                    change = await stream.try_next()
+                    if change is None:
+                        break
+                    batch.append(change)
+
+                if batch:
+                    await self._dispatch(batch)
+
+                # Stored even for empty batches: the token still advances past
+                # unrelated writes, which keeps resumes from falling off the oplog
+                state = await self.db.derived_state.update_one(
+                    {"_id": STATE_ID, "owner": self.owner},
+                    {"$set": {
+                        "resume_token": stream.resume_token,
+                        "lease_until": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+                    }}
+                )
+                if state.matched_count == 0:
+                    logger.warning("Event bus lease lost, stopping consumer")
+                    self.is_leader = False
+                    return
+
+    async def _dispatch(self, batch: List[Dict]):
+        for projector in self.projectors:
+            events = [e for e in batch if e["ns"]["coll"] in projector.collections]
+            if events:
+                await projector.handle(self.db, events)
+
+        self.batches += 1
+        self.events += len(batch)
+        self.last_event_at = datetime.utcnow()
+
+    def stats(self):
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "leader": self.is_leader,
+            "owner": self.owner,
+            "batches": self.batches,
+            "events": self.events,
+            "errors": self.errors,
+            "last_event_at": self.last_event_at,
+        }
@@ -0,0 +1,55 @@
+"""Request-scoped concurrent fan-out of independent reads."""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class FanOutResult:
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, str] = {}
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.errors)
+
+
+async def fan_out(
+    calls: Dict[str, Callable[[], Awaitable[Any]]],
+    timeout: float,
+    max_concurrency: int,
+) -> FanOutResult:
+    """Run independent calls concurrently and collect what finished in time.
+
+    At most ``max_concurrency`` calls hold a database round trip at once.
+    Whatever hasn't finished after ``timeout`` seconds is cancelled. Failed
+    and timed-out calls are reported in ``errors`` instead of raising, so the
+    caller decides which parts it can do without.
+    """
+    budget = asyncio.Semaphore(max_concurrency)
+
+    async def run(fn):
+        async with budget:
+            return await fn()
+
+    tasks = {asyncio.ensure_future(run(fn)): name for name, fn in calls.items()}
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+    finally:
+        # Also reached when the caller is cancelled: don't leave calls running
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    outcome = FanOutResult()
+    for task, name in tasks.items():
+        if task in pending:
+            outcome.errors[name] = "timeout"
+        elif task.exception() is not None:
+            logger.warning("Fan-out call %s failed: %r", name, task.exception())
+            outcome.errors[name] = type(task.exception()).__name__
+        else:
+            outcome.results[name] = task.result()
+    return outcome
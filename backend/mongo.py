@@ -0,0 +1,38 @@
+"""Lazily connected MongoDB handle.
+
+Importing motor (and pymongo with it) and creating the client is deferred to
+the first database access, so the app imports and answers requests that
+don't touch Mongo, such as ``GET /api/``, without paying for it. Other
+modules import pymongo names inside the functions that use them for the
+same reason; only the standalone ``bson`` package is imported up front.
+"""
+import os
+
+
+class LazyDatabase:
+    """Stands in for the Motor database and creates it on first use."""
+
+    def __init__(self, url_env: str = 'MONGO_URL', name_env: str = 'DB_NAME'):
+        self._url_env = url_env
+        self._name_env = name_env
+        self._client = None
+        self._database = None
+
+    def _get(self):
+        if self._database is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+
+            self._client = AsyncIOMotorClient(os.environ[self._url_env])
+            self._database = self._client[os.environ[self._name_env]]
+        return self._database
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set in __init__: collections, watch(), ...
+        return getattr(self._get(), name)
+
+    def __getitem__(self, name):
+        return self._get()[name]
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
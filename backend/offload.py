@@ -0,0 +1,126 @@
+"""Executor layer for work that must not run on the event loop.
+
+CPU-heavy work goes to a process pool so it doesn't hold the GIL while other
+requests are being served; a thread pool stands in when no worker processes
+are configured. Database I/O is already asynchronous through Motor, so
+nothing else needs offloading. Every call is tagged with a stage name, and
+per-stage counters, in-flight depth and recent queue-wait / run-time
+percentiles are kept for ``/api/metrics``.
+
+Functions sent to the process pool must be picklable, i.e. defined at
+module level.
+"""
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# Latency samples kept per stage for the percentiles
+SAMPLE_WINDOW = 1000
+
+
+def _timed(fn: Callable, args: tuple):
+    # time.time() rather than monotonic: it is compared across processes
+    started = time.time()
+    result = fn(*args)
+    return started, time.time() - started, result
+
+
+def _percentiles(samples) -> Dict[str, float]:
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    pick = lambda pct: round(ordered[min(len(ordered) - 1, int(pct * len(ordered)))] * 1000, 2)
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(ordered[-1] * 1000, 2)}
+
+
+class StageStats:
+    def __init__(self, pool: str):
+        self.pool = pool
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.queue_wait = deque(maxlen=SAMPLE_WINDOW)
+        self.run_time = deque(maxlen=SAMPLE_WINDOW)
+
+    def as_dict(self):
+        return {
+            "pool": self.pool,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_depth": self.in_flight,
+            "queue_wait": _percentiles(self.queue_wait),
+            "run_time": _percentiles(self.run_time),
+        }
+
+
+class Offloader:
+    """Process pool behind ``run_cpu``, with a thread pool fallback.
+
+    With ``process_workers=0`` CPU stages fall back to the thread pool, which
+    keeps the event loop free but still contends for the GIL.
+    """
+
+    def __init__(self, thread_workers: int = 8, process_workers: int = 2):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._threads = None
+        self._processes = None
+        self._stages: Dict[str, StageStats] = {}
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        # Pools start on first use so importing the app stays cheap
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self.thread_workers, thread_name_prefix="offload")
+        return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            # spawn: forking a process that already runs driver threads isn't safe
+            self._processes = ProcessPoolExecutor(
+                self.process_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._processes
+
+    async def _run(self, pool, pool_name: str, stage: str, fn: Callable, args: tuple) -> Any:
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = StageStats(pool_name)
+
+        stats.submitted += 1
+        stats.in_flight += 1
+        submitted_at = time.time()
+        try:
+            started, run_time, result = await asyncio.get_running_loop().run_in_executor(pool, _timed, fn, args)
+        except BaseException:
+            stats.failed += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+        stats.completed += 1
+        stats.queue_wait.append(max(0.0, started - submitted_at))
+        stats.run_time.append(run_time)
+        return result
+
+    async def run_cpu(self, stage: str, fn: Callable, *args) -> Any:
+        """Run a CPU-bound call in the process pool."""
+        if self.process_workers <= 0:
+            return await self._run(self._thread_pool(), "thread", stage, fn, args)
+        return await self._run(self._process_pool(), "process", stage, fn, args)
+
+    def stats(self):
+        return {
+            "thread_workers": self.thread_workers,
+            "process_workers": self.process_workers,
+            "stages": {name: stats.as_dict() for name, stats in self._stages.items()},
+        }
+
+    def shutdown(self):
+        if self._threads is not None:
+            self._threads.shutdown(wait=False)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
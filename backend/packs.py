@@ -0,0 +1,230 @@
+"""Offline regional data packs.
+
+Locations are grouped by geohash prefix and each region is exported as a
+gzipped JSON snapshot stored in the ``region_packs`` collection. A pack is
+only rewritten (and its version bumped) when the content of its region
+changed since the last build, so clients can keep the packs they already
+have and fetch only the ones whose version moved.
+
+Run as a job with ``python packs.py`` (e.g. from cron), or through
+``POST /api/packs/rebuild``.
+"""
+import gzip
+import hashlib
+import json
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import review_summary
+
+# Geohash precision 4 cells are roughly 39km x 20km, about the size of a city
+PACK_PRECISION = 4
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def geohash(latitude: float, longitude: float, precision: int = PACK_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def pack_entry(location: Dict) -> Dict:
+    """What a pack keeps of a location: no photos or embedded reviews."""
+    entry = {
+        "id": str(location["_id"]),
+        "name": location["name"],
+        "address": location["address"],
+        "latitude": location["latitude"],
+        "longitude": location["longitude"],
+        "location_type": location["location_type"],
+        "privacy_level": location["privacy_level"],
+        "requires_purchase": location.get("requires_purchase", False),
+        "description": location.get("description"),
+        "amenities": location.get("amenities", []),
+        "verified": location.get("verified", False),
+        "average_rating": location.get("average_rating", 0.0),
+        "total_reviews": location.get("total_reviews", 0),
+    }
+    summary = location.get("review_summary")
+    if summary:
+        entry["ratings"] = review_summary.aggregates(summary)
+    return entry
+
+
+def _canonical(data) -> bytes:
+    return json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def group_by_region(locations, precision: int = PACK_PRECISION) -> Dict[str, List[Dict]]:
+    regions: Dict[str, List[Dict]] = {}
+    for location in locations:
+        region = geohash(location["latitude"], location["longitude"], precision)
+        regions.setdefault(region, []).append(pack_entry(location))
+    for entries in regions.values():
+        entries.sort(key=lambda e: e["id"])
+    return regions
+
+
+def encode_pack(payload: Dict) -> Tuple[bytes, str]:
+    """Gzipped pack bytes and their sha256."""
+    # mtime=0 keeps the archive bytes stable for identical payloads
+    data = gzip.compress(_canonical(payload), mtime=0)
+    return data, hashlib.sha256(data).hexdigest()
+
+
+async def build_packs(db, precision: int = PACK_PRECISION, run_cpu=None, only_if_changed: bool = False) -> Dict:
+    """Rebuild the packs whose region content changed; drop emptied regions.
+
+    ``run_cpu(stage, fn, *args)`` lets the server push compression off the
+    event loop; the standalone job just encodes inline. With
+    ``only_if_changed`` the build is skipped outright unless the event bus
+    recorded a location or review change since the last build.
+    """
+    state = await db.derived_state.find_one({"_id": "region_packs"}) or {}
+    if only_if_changed and state.get("built_version") == state.get("version", 0):
+        return {"built": [], "unchanged": [], "removed": [], "skipped": True}
+
+    locations = await db.locations.find(
+        {}, {"photos": 0, "review_summary.latest": 0, "review_summary.most_helpful": 0}
+    ).to_list(None)
+    regions = group_by_region(locations, precision)
+
+    existing = {
+        pack["_id"]: pack
+        async for pack in db.region_packs.find({}, {"content_hash": 1, "version": 1})
+    }
+
+    built, unchanged = [], []
+    for region, entries in regions.items():
+        content_hash = hashlib.sha256(_canonical(entries)).hexdigest()
+        previous = existing.get(region)
+        if previous and previous["content_hash"] == content_hash:
+            unchanged.append(region)
+            continue
+
+        version = previous["version"] + 1 if previous else 1
+        built_at = datetime.utcnow()
+        payload = {
+            "region": region,
+            "version": version,
+            "built_at": built_at.isoformat() + "Z",
+            "locations": entries,
+        }
+        if run_cpu is not None:
+            data, sha256 = await run_cpu("pack_encode", encode_pack, payload)
+        else:
+            data, sha256 = encode_pack(payload)
+        await db.region_packs.replace_one(
+            {"_id": region},
+            {
+                "_id": region,
+                "version": version,
+                "content_hash": content_hash,
+                "sha256": sha256,
+                "size": len(data),
+                "location_count": len(entries),
+                "built_at": built_at,
+                "data": data,
+            },
+            upsert=True,
+        )
+        built.append(region)
+
+    removed = [region for region in existing if region not in regions]
+    if removed:
+        await db.region_packs.delete_many({"_id": {"$in": removed}})
+
+    await db.derived_state.update_one(
+        {"_id": "region_packs"}, {"$set": {"built_version": state.get("version", 0)}}, upsert=True
+    )
+    return {"built": sorted(built), "unchanged": sorted(unchanged), "removed": sorted(removed), "skipped": False}
+
+
+async def manifest(db) -> Dict:
+    packs = await db.region_packs.find({}, {"data": 0, "content_hash": 0}).sort("_id", 1).to_list(None)
+    return {
+        "precision": PACK_PRECISION,
+        "packs": [
+            {
+                "region": pack["_id"],
+                "version": pack["version"],
+                "sha256": pack["sha256"],
+                "size": pack["size"],
+                "location_count": pack["location_count"],
+                "built_at": pack["built_at"],
+                "url": "/api/packs/" + pack["_id"],
+            }
+            for pack in packs
+        ],
+    }
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive (start, end).
+
+    Returns None when the whole body should be sent and raises ValueError
+    when the range can't be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        # Multiple ranges or other units: ignoring the header is allowed
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+async def _main():
+    import os
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        only_if_changed = os.environ.get('EVENT_BUS_ENABLED', 'false').lower() == 'true'
+        print(json.dumps(await build_packs(client[os.environ['DB_NAME']], only_if_changed=only_if_changed)))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(_main())
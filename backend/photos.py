@@ -0,0 +1,54 @@
+"""Validation of base64-encoded photo uploads.
+
+Decoding megabytes of base64 is CPU-bound; it runs as part of
+``uploads.parse_upload``, which server.py sends to the process pool for
+large bodies rather than running it on the event loop.
+"""
+import base64
+import binascii
+from typing import List
+
+MAX_PHOTOS = 10
+MAX_PHOTO_BYTES = 5 * 1024 * 1024
+
+_SIGNATURES = (
+    b"\xff\xd8\xff",  # JPEG
+    b"\x89PNG\r\n\x1a\n",
+    b"GIF87a",
+    b"GIF89a",
+)
+
+
+def _is_image(data: bytes) -> bool:
+    if data.startswith(_SIGNATURES):
+        return True
+    # WEBP and HEIC identify themselves a few bytes in
+    return (data[:4] == b"RIFF" and data[8:12] == b"WEBP") or data[4:8] == b"ftyp"
+
+
+def validate_photos(photos: List[str], max_bytes: int = MAX_PHOTO_BYTES) -> None:
+    """Check every photo decodes to an image of at most ``max_bytes``.
+
+    Accepts plain base64 or ``data:image/...;base64,`` URIs. Raises
+    ValueError describing the first bad photo; nothing is returned so the
+    payload isn't shipped back from the worker process.
+    """
+    if len(photos) > MAX_PHOTOS:
+        raise ValueError(f"At most {MAX_PHOTOS} photos are allowed")
+    for index, photo in enumerate(photos):
+        encoded = photo
+        if photo.startswith("data:"):
+            _, comma, encoded = photo.partition(",")
+            if not comma:
+                raise ValueError(f"Photo {index + 1} is a data URI without a payload")
+        # Cheap size check before decoding: 4 base64 chars per 3 bytes
+        if len(encoded) * 3 // 4 > max_bytes + 3:
+            raise ValueError(f"Photo {index + 1} is larger than {max_bytes // (1024 * 1024)}MB")
+        try:
+            data = base64.b64decode(encoded, validate=True)
+        except (binascii.Error, ValueError):
+            raise ValueError(f"Photo {index + 1} is not valid base64")
+        if len(data) > max_bytes:
+            raise ValueError(f"Photo {index + 1} is larger than {max_bytes // (1024 * 1024)}MB")
+        if not _is_image(data):
+            raise ValueError(f"Photo {index + 1} is not a supported image")
@@ -0,0 +1,131 @@
+"""Derived-data maintenance: review aggregates, cache invalidation, cascades.
+
+The ``apply_*`` / ``cascade_*`` functions are what keeps derived data in
+step with a write. They run inline in the request handlers, or, with the
+event bus enabled (see events.py), from the projectors below as change
+stream events arrive, taking that work off the request path.
+
+Change stream delivery is at-least-once: after a restart the stream resumes
+from the last stored token and may replay events. Projectors therefore
+have to be idempotent.
+"""
+import logging
+from typing import Dict, List
+
+from bson import ObjectId
+
+import review_summary
+
+logger = logging.getLogger(__name__)
+
+
+async def apply_review(db, review: Dict, session=None):
+    """Fold a new review into its location's summary and average rating."""
+    location_id = ObjectId(review["location_id"])
+    result = await db.locations.update_one(
+        {"_id": location_id, "review_summary": {"$exists": True}},
+        review_summary.summary_increment(review),
+        session=session
+    )
+    if not result.matched_count:
+        # Locations created before summaries existed get theirs built from scratch
+        all_reviews = await db.reviews.find({"location_id": review["location_id"]}, {"photos": 0}, session=session).to_list(1000)
+        await db.locations.update_one(
+            {"_id": location_id, "review_summary": {"$exists": False}},
+            {"$set": {"review_summary": review_summary.build_summary(all_reviews)}},
+            session=session
+        )
+
+    # Derived on the server from the stored summary, so concurrent reviews
+    # can't overwrite each other's totals with a stale snapshot
+    await db.locations.update_one({"_id": location_id}, [{"$set": {
+        "total_reviews": "$review_summary.count",
+        "average_rating": {"$cond": [
+            {"$gt": ["$review_summary.count", 0]},
+            {"$round": [{"$divide": ["$review_summary.rating_sums.overall", "$review_summary.count"]}, 1]},
+            0.0
+        ]}
+    }}], session=session)
+
+
+async def apply_helpful(db, review: Dict):
+    """Refresh the embedded copies of a review after its helpful_count changed."""
+    review_id = str(review["_id"])
+    try:
+        location_filter = {"_id": ObjectId(review["location_id"]), "review_summary": {"$exists": True}}
+    except Exception:
+        return
+
+    # Rebuilt from the reviews themselves and written in one update: separate
+    # $pull/$push steps could interleave with another vote and leave duplicates
+    top = await db.reviews.find({"location_id": review["location_id"]}, {"photos": 0}).sort(
+        list(review_summary.MOST_HELPFUL_SORT.items())
+    ).limit(review_summary.TOP_N).to_list(review_summary.TOP_N)
+    await db.locations.update_one(
+        location_filter,
+        {
+            # helpful_count only grows, so a late write can't roll it back
+            "$max": {"review_summary.latest.$[r].helpful_count": review["helpful_count"]},
+            "$set": {"review_summary.most_helpful": [review_summary.embedded_review(r) for r in top]}
+        },
+        array_filters=[{"r.id": review_id}]
+    )
+
+
+async def cascade_location_delete(db, location_id: str):
+    """Remove the reviews and saved entries of a deleted location."""
+    await db.reviews.delete_many({"location_id": location_id})
+    await db.saved_locations.delete_many({"location_id": location_id})
+
+
+async def invalidate_packs(db):
+    """Tell the pack builder that location data changed since its last run."""
+    await db.derived_state.update_one({"_id": "region_packs"}, {"$inc": {"version": 1}}, upsert=True)
+
+
+class ReviewAggregateProjector:
+    collections = ("reviews",)
+
+    async def handle(self, db, events: List[Dict]):
+        for event in events:
+            review = event.get("fullDocument")
+            if review is None:
+                # Deleted since; only happens through the location cascade
+                continue
+            if event["operationType"] == "insert":
+                # The mark keeps a replayed insert from being counted twice; it
+                # commits together with the summary update or not at all
+                async with await db.client.start_session() as session:
+                    async with session.start_transaction():
+                        claimed = await db.reviews.update_one(
+                            {"_id": review["_id"], "summarized": {"$ne": True}},
+                            {"$set": {"summarized": True}},
+                            session=session
+                        )
+                        if claimed.modified_count:
+                            await apply_review(db, review, session=session)
+            elif event["operationType"] == "update":
+                if "helpful_count" in event["updateDescription"]["updatedFields"]:
+                    await apply_helpful(db, review)
+
+
+class CascadeDeleteProjector:
+    collections = ("locations",)
+
+    async def handle(self, db, events: List[Dict]):
+        for event in events:
+            if event["operationType"] == "delete":
+                await cascade_location_delete(db, str(event["documentKey"]["_id"]))
+
+
+class PackInvalidationProjector:
+    collections = ("locations", "reviews")
+
+    async def handle(self, db, events: List[Dict]):
+        # One bump per batch is enough to mark every pack for a rebuild check
+        relevant = [
+            e for e in events
+            if e["ns"]["coll"] == "locations" or e["operationType"] in ("insert", "delete")
+        ]
+        if relevant:
+            await invalidate_packs(db)
@@ -0,0 +1,82 @@
+"""Token-bucket rate limiting keyed by client and route."""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+def client_key(forwarded_for: Optional[str], peer: Optional[str], trusted_hops: int) -> str:
+    """The client address to rate limit on.
+
+    Each proxy appends the address it received the request from to
+    ``X-Forwarded-For``, so only the entries added by our own proxies can be
+    trusted: the one ``trusted_hops`` from the right is what the outermost
+    trusted proxy saw. Anything further left is client-supplied. Without
+    enough entries, or with no trusted proxies, the peer address is used.
+    """
+    if forwarded_for and trusted_hops > 0:
+        entries = [e.strip() for e in forwarded_for.split(",") if e.strip()]
+        if len(entries) >= trusted_hops:
+            return entries[-trusted_hops]
+    return peer or "unknown"
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated_at = now
+
+
+class RateLimiter:
+    """Per (route, client) token buckets held in a bounded LRU store.
+
+    Each route gets its own ``capacity`` (burst size) and ``refill_rate``
+    (tokens per second). When the store is full the least recently seen
+    bucket is dropped; a dropped client simply starts again with a full
+    bucket, which errs on the side of letting requests through.
+    """
+
+    def __init__(self, routes: Dict[str, Tuple[float, float]], max_keys: int = 10000, clock=time.monotonic):
+        self.routes = routes
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.allowed: Dict[str, int] = {route: 0 for route in routes}
+        self.rejected: Dict[str, int] = {route: 0 for route in routes}
+        self.evicted = 0
+
+    def acquire(self, route: str, client_id: str) -> Optional[float]:
+        """Take one token. Returns None when allowed, else seconds until retry."""
+        capacity, refill_rate = self.routes[route]
+        now = self.clock()
+        key = (route, client_id)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(capacity, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated_at) * refill_rate)
+            bucket.updated_at = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            self.allowed[route] += 1
+            return None
+
+        self.rejected[route] += 1
+        return (1 - bucket.tokens) / refill_rate
+
+    def stats(self):
+        return {
+            "tracked_clients": len(self._buckets),
+            "max_keys": self.max_keys,
+            "evicted": self.evicted,
+            "allowed": dict(self.allowed),
+            "rejected": dict(self.rejected),
+        }
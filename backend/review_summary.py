@@ -0,0 +1,133 @@
+"""Materialized per-location review summary.
+
+The summary lives on the location document under ``review_summary`` and is
+kept up to date with ``$inc``/``$push`` on every review write, so the detail
+screen can be served from a single read of the location.
+
+Stored shape::
+
+    {
+        "count": 3,
+        "rating_sums": {"staff": 13, "comfort": 12, ..., "overall": 12.25},
+        "histogram": {"1": 0, "2": 0, "3": 0, "4": 3, "5": 0},
+        "issues": {"no_privacy": 1},
+        "would_return": 2,
+        "latest": [<review>, ...],        # newest first, at most TOP_N
+        "most_helpful": [<review>, ...],  # by helpful_count, at most TOP_N
+    }
+"""
+from typing import Dict, Iterable
+
+TOP_N = 5
+
+SUB_RATINGS = ("staff", "comfort", "privacy", "safety")
+
+LATEST_SORT = {"created_at": -1}
+MOST_HELPFUL_SORT = {"helpful_count": -1, "created_at": -1}
+
+
+def empty_summary() -> Dict:
+    return {
+        "count": 0,
+        "rating_sums": {name: 0 for name in SUB_RATINGS + ("overall",)},
+        "histogram": {str(star): 0 for star in range(1, 6)},
+        "issues": {},
+        "would_return": 0,
+        "latest": [],
+        "most_helpful": [],
+    }
+
+
+def issue_key(flag: str) -> str:
+    # Issue flags become field names, which can't contain dots or start with $
+    return flag.replace(".", "_").lstrip("$") or "_"
+
+
+def histogram_bucket(overall_rating: float) -> str:
+    return str(min(5, max(1, int(overall_rating + 0.5))))
+
+
+def embedded_review(review: Dict) -> Dict:
+    """Copy of a review small enough to embed; photos are left out."""
+    embedded = {k: v for k, v in review.items() if k not in ("_id", "photos")}
+    if "_id" in review:
+        embedded["id"] = str(review["_id"])
+    embedded["photos"] = []
+    return embedded
+
+
+def summary_increment(review: Dict) -> Dict:
+    """Update document folding one new review into ``review_summary``."""
+    inc = {
+        "review_summary.count": 1,
+        "review_summary.rating_sums.overall": review["overall_rating"],
+        "review_summary.histogram." + histogram_bucket(review["overall_rating"]): 1,
+        "review_summary.would_return": 1 if review["would_return"] else 0,
+    }
+    for name in SUB_RATINGS:
+        inc["review_summary.rating_sums." + name] = review[name + "_rating"]
+    for flag in set(review.get("issues", [])):
+        inc["review_summary.issues." + issue_key(flag)] = 1
+
+    embedded = embedded_review(review)
+    return {
+        "$inc": inc,
+        "$push": {
+            "review_summary.latest": {"$each": [embedded], "$sort": LATEST_SORT, "$slice": TOP_N},
+            "review_summary.most_helpful": {"$each": [embedded], "$sort": MOST_HELPFUL_SORT, "$slice": TOP_N},
+        },
+    }
+
+
+def build_summary(reviews: Iterable[Dict]) -> Dict:
+    """Full rebuild from the reviews collection, for locations without a summary."""
+    summary = empty_summary()
+    embedded = []
+    for review in reviews:
+        summary["count"] += 1
+        summary["rating_sums"]["overall"] += review["overall_rating"]
+        for name in SUB_RATINGS:
+            summary["rating_sums"][name] += review[name + "_rating"]
+        summary["histogram"][histogram_bucket(review["overall_rating"])] += 1
+        if review["would_return"]:
+            summary["would_return"] += 1
+        for flag in set(review.get("issues", [])):
+            key = issue_key(flag)
+            summary["issues"][key] = summary["issues"].get(key, 0) + 1
+        embedded.append(embedded_review(review))
+
+    summary["latest"] = sorted(embedded, key=lambda r: r["created_at"], reverse=True)[:TOP_N]
+    summary["most_helpful"] = sorted(
+        embedded, key=lambda r: (r.get("helpful_count", 0), r["created_at"]), reverse=True
+    )[:TOP_N]
+    return summary
+
+
+def average_rating(summary: Dict) -> float:
+    if not summary["count"]:
+        return 0.0
+    return round(summary["rating_sums"]["overall"] / summary["count"], 1)
+
+
+def aggregates(summary: Dict) -> Dict:
+    """The rating figures derived from the stored counters."""
+    count = summary["count"]
+    return {
+        "total_reviews": count,
+        "average_rating": average_rating(summary),
+        "average_ratings": {
+            name: round(summary["rating_sums"][name] / count, 1) if count else 0.0
+            for name in SUB_RATINGS
+        },
+        "rating_histogram": summary["histogram"],
+        "issue_counts": summary["issues"],
+        "would_return_percent": round(100.0 * summary["would_return"] / count, 1) if count else 0.0,
+    }
+
+
+def present_summary(summary: Dict) -> Dict:
+    """Turn the stored summary into what the detail screen displays."""
+    presented = aggregates(summary)
+    presented["latest_reviews"] = summary["latest"]
+    presented["most_helpful_reviews"] = summary["most_helpful"]
+    return presented
@@ -1,23 +1,36 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Response
+from fastapi.exceptions import RequestValidationError
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
+import math
 from datetime import datetime
 from bson import ObjectId
 
+from rate_limit import RateLimiter, client_key
+from single_flight import SingleFlight
+import review_summary
+import packs
+from fanout import fan_out
+import dedupe
+import uploads
+from uploads import LocationCreate, ReviewCreate
+from offload import Offloader
+import projectors
+from events import EventBus
+from mongo import LazyDatabase
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, created on first use so imports and cold starts stay fast
+db = LazyDatabase('MONGO_URL', 'DB_NAME')
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -25,6 +38,96 @@ app = FastAPI()
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Process pool for CPU-heavy stages; the thread pool is only used when
+# OFFLOAD_PROCESS_WORKERS=0
+offloader = Offloader(
+    thread_workers=int(os.environ.get('OFFLOAD_THREAD_WORKERS', '8')),
+    process_workers=int(os.environ.get('OFFLOAD_PROCESS_WORKERS', '2')),
+)
+
+# Derived data (review aggregates, cascades, pack invalidation) is maintained
+# from MongoDB change streams when enabled; needs a replica set
+EVENT_BUS_ENABLED = os.environ.get('EVENT_BUS_ENABLED', 'false').lower() == 'true'
+event_bus = EventBus(db, [
+    projectors.ReviewAggregateProjector(),
+    projectors.CascadeDeleteProjector(),
+    projectors.PackInvalidationProjector(),
+])
+
+# Set to "false" only for load testing
+RATE_LIMITS_ENABLED = os.environ.get('RATE_LIMITS_ENABLED', 'true').lower() != 'false'
+
+# Rate limits per route: (burst capacity, tokens refilled per second)
+rate_limiter = RateLimiter(
+    {
+        "get_locations": (30, 5.0),
+        "create_location": (5, 1 / 60),
+        "create_review": (5, 1 / 60),
+        "mark_review_helpful": (10, 0.2),
+        # Scans the whole collection and recompresses changed packs
+        "rebuild_packs": (2, 1 / 300),
+        # Each call runs a geo query per scanned location for up to 10s
+        "dedupe_scan": (5, 1 / 60),
+    },
+    max_keys=int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', '10000')),
+)
+
+# Number of proxies in front of the app that append to X-Forwarded-For (the ingress)
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '1'))
+
+# Per-request budget for composite endpoints running several reads at once
+FANOUT_TIMEOUT_SECONDS = float(os.environ.get('FANOUT_TIMEOUT_SECONDS', '2.0'))
+FANOUT_MAX_CONCURRENCY = int(os.environ.get('FANOUT_MAX_CONCURRENCY', '4'))
+
+# Coalesces identical concurrent GET /api/locations queries
+locations_flight = SingleFlight()
+
+def client_id(request: Request):
+    # Behind the ingress the peer address is the proxy; use the address it appended
+    return client_key(
+        request.headers.get("x-forwarded-for"),
+        request.client.host if request.client else None,
+        TRUSTED_PROXY_HOPS
+    )
+
+def rate_limited(route: str):
+    """Route dependency rejecting clients that exhausted their token bucket"""
+    async def check(request: Request):
+        if not RATE_LIMITS_ENABLED:
+            return
+        retry_after = rate_limiter.acquire(route, client_id(request))
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+    return Depends(check)
+
+# The embedded review summary is only read by the detail endpoint
+LOCATION_PROJECTION = {"review_summary": 0}
+
+async def parse_upload(request: Request, model):
+    """Parse and validate a photo-carrying body; large ones in the process pool"""
+    body = await request.body()
+    try:
+        if len(body) <= uploads.INLINE_BODY_BYTES:
+            item, errors = uploads.parse_upload(model, body)
+        else:
+            item, errors = await offloader.run_cpu("upload_parse", uploads.parse_upload, model, body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if errors:
+        raise RequestValidationError(errors)
+    return item
+
+def upload_body(model):
+    """OpenAPI request body for endpoints that parse it with parse_upload"""
+    return {"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": model.model_json_schema()}}
+    }}
+
 # Helper function for ObjectId serialization
 def serialize_doc(doc):
     if doc is None:
@@ -33,19 +136,7 @@ def serialize_doc(doc):
     return doc
 
 # ==================== MODELS ====================
-
-class LocationCreate(BaseModel):
-    name: str
-    address: str
-    latitude: float
-    longitude: float
-    location_type: str  # cafe, restaurant, park, library, etc.
-    privacy_level: str  # private, semi-private, public
-    requires_purchase: bool = False
-    description: Optional[str] = None
-    amenities: List[str] = []  # changing_table, high_chairs, quiet_area, etc.
-    photos: List[str] = []  # base64 encoded images
-    owner_id: Optional[str] = None
+# LocationCreate and ReviewCreate live in uploads.py, see parse_upload
 
 class LocationResponse(BaseModel):
     id: str
@@ -65,18 +156,16 @@ class LocationResponse(BaseModel):
     created_at: datetime
     verified: bool = False
 
-class ReviewCreate(BaseModel):
-    location_id: str
-    staff_rating: int  # 1-5
-    comfort_rating: int  # 1-5
-    privacy_rating: int  # 1-5
-    safety_rating: int  # 1-5
-    would_return: bool
-    comment: Optional[str] = None
-    issues: List[str] = []  # red flags
-    photos: List[str] = []  # base64 encoded images
-    anonymous: bool = False
-    reviewer_name: Optional[str] = None
+class MergeCandidate(BaseModel):
+    id: str
+    name: str
+    address: Optional[str] = None
+    distance_m: float
+    similarity: float
+    exact: bool
+
+class LocationCreateResponse(LocationResponse):
+    merge_candidates: List[MergeCandidate] = []  # nearby locations that look like the same place
 
 class ReviewResponse(BaseModel):
     id: str
@@ -95,33 +184,75 @@ class ReviewResponse(BaseModel):
     helpful_count: int = 0
     created_at: datetime
 
+class ReviewSummaryResponse(BaseModel):
+    total_reviews: int = 0
+    average_rating: float = 0.0
+    average_ratings: Dict[str, float] = {}  # staff, comfort, privacy, safety
+    rating_histogram: Dict[str, int] = {}  # "1".."5" -> number of reviews
+    issue_counts: Dict[str, int] = {}
+    would_return_percent: float = 0.0
+    latest_reviews: List[ReviewResponse] = []
+    most_helpful_reviews: List[ReviewResponse] = []
+
+class LocationDetailResponse(BaseModel):
+    location: LocationResponse
+    summary: ReviewSummaryResponse
+
+class LocationViewResponse(LocationDetailResponse):
+    saved: Optional[bool] = None  # None when the read failed
+    errors: Dict[str, str] = {}  # part name -> "timeout" or error type
+
 class SavedLocationCreate(BaseModel):
     location_id: str
     user_id: str = "default_user"  # For MVP, we use a default user
 
+class SavedCheckRequest(BaseModel):
+    location_ids: List[str] = Field(..., max_length=200)
+    user_id: str = "default_user"
+
 # ==================== LOCATION ENDPOINTS ====================
 
 @api_router.get("/")
 async def root():
     return {"message": "Doudou API - Breastfeeding Location Finder"}
 
-@api_router.post("/locations", response_model=LocationResponse)
-async def create_location(location: LocationCreate):
+@api_router.post("/locations", response_model=LocationCreateResponse, dependencies=[rate_limited("create_location")],
+                 openapi_extra=upload_body(LocationCreate))
+async def create_location(request: Request):
     """Create a new nursing-friendly location"""
+    location = await parse_upload(request, LocationCreate)
     location_dict = location.dict()
+    location_dict["geo"] = dedupe.geo_point(location.latitude, location.longitude)
+    
+    # Reject exact duplicates; similar nearby places are returned as merge candidates.
+    # $nearSphere needs the geo index, which is built in the background at startup
+    if await geo_index_ready():
+        duplicates = await dedupe.find_duplicates(db, location_dict)
+    else:
+        logger.warning("Geo index missing; creating location without duplicate detection")
+        duplicates = []
+    for duplicate in duplicates:
+        if duplicate["exact"]:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "Location already exists", "duplicate_of": duplicate}
+            )
+    
     location_dict["created_at"] = datetime.utcnow()
     location_dict["verified"] = False
     location_dict["average_rating"] = 0.0
     location_dict["total_reviews"] = 0
+    location_dict["review_summary"] = review_summary.empty_summary()
     
     result = await db.locations.insert_one(location_dict)
     location_dict["id"] = str(result.inserted_id)
     if "_id" in location_dict:
         del location_dict["_id"]
+    del location_dict["review_summary"]
     
-    return LocationResponse(**location_dict)
+    return LocationCreateResponse(**location_dict, merge_candidates=duplicates)
 
-@api_router.get("/locations", response_model=List[LocationResponse])
+@api_router.get("/locations", response_model=List[LocationResponse], dependencies=[rate_limited("get_locations")])
 async def get_locations(
     location_type: Optional[str] = None,
     privacy_level: Optional[str] = None,
@@ -143,20 +274,19 @@ async def get_locations(
     if verified_only:
         query["verified"] = True
     
-    locations = await db.locations.find(query).to_list(100)
+    async def fetch():
+        locations = await db.locations.find(query, LOCATION_PROJECTION).to_list(100)
+        return [LocationResponse(**serialize_doc(loc)) for loc in locations]
     
-    result = []
-    for loc in locations:
-        loc_data = serialize_doc(loc)
-        result.append(LocationResponse(**loc_data))
-    
-    return result
+    # Identical concurrent requests share one Mongo query and its serialized result
+    key = (location_type, privacy_level, free_only, verified_only, lat, lng, radius_km)
+    return await locations_flight.do(key, fetch)
 
 @api_router.get("/locations/{location_id}", response_model=LocationResponse)
 async def get_location(location_id: str):
     """Get a specific location by ID"""
     try:
-        location = await db.locations.find_one({"_id": ObjectId(location_id)})
+        location = await db.locations.find_one({"_id": ObjectId(location_id)}, LOCATION_PROJECTION)
     except:
         raise HTTPException(status_code=400, detail="Invalid location ID")
     
@@ -166,6 +296,72 @@ async def get_location(location_id: str):
     loc_data = serialize_doc(location)
     return LocationResponse(**loc_data)
 
+async def load_location_detail(location_oid: ObjectId) -> Optional[LocationDetailResponse]:
+    """A location with its materialized review summary; None when it doesn't exist"""
+    location = await db.locations.find_one({"_id": location_oid})
+    if not location:
+        return None
+    
+    summary = location.pop("review_summary", None)
+    if summary is None:
+        # Locations created before summaries existed get theirs built on first view
+        reviews = await db.reviews.find({"location_id": str(location_oid)}, {"photos": 0}).to_list(1000)
+        summary = review_summary.build_summary(reviews)
+        await db.locations.update_one(
+            {"_id": location["_id"], "review_summary": {"$exists": False}},
+            {"$set": {"review_summary": summary}}
+        )
+    
+    return LocationDetailResponse(
+        location=LocationResponse(**serialize_doc(location)),
+        summary=ReviewSummaryResponse(**review_summary.present_summary(summary))
+    )
+
+@api_router.get("/locations/{location_id}/detail", response_model=LocationDetailResponse)
+async def get_location_detail(location_id: str):
+    """Get a location together with its materialized review summary"""
+    try:
+        location_oid = ObjectId(location_id)
+    except:
+        raise HTTPException(status_code=400, detail="Invalid location ID")
+    
+    detail = await load_location_detail(location_oid)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return detail
+
+@api_router.get("/locations/{location_id}/view", response_model=LocationViewResponse)
+async def get_location_view(location_id: str, user_id: str = "default_user"):
+    """Location detail plus the user's saved status for the detail screen in one call"""
+    try:
+        location_oid = ObjectId(location_id)
+    except:
+        raise HTTPException(status_code=400, detail="Invalid location ID")
+    
+    # Both reads are independent, so they run at the same time under one budget
+    outcome = await fan_out(
+        {
+            "detail": lambda: load_location_detail(location_oid),
+            "saved": lambda: db.saved_locations.find_one({"location_id": location_id, "user_id": user_id}),
+        },
+        timeout=FANOUT_TIMEOUT_SECONDS,
+        max_concurrency=FANOUT_MAX_CONCURRENCY
+    )
+    
+    # Only the detail is essential; the saved status degrades to None
+    errors = dict(outcome.errors)
+    if errors.pop("detail", None) is not None:
+        raise HTTPException(status_code=503, detail="Location lookup failed")
+    detail = outcome.results["detail"]
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    
+    view = LocationViewResponse(**detail.dict(), errors=errors)
+    if "saved" in outcome.results:
+        view.saved = outcome.results["saved"] is not None
+    
+    return view
+
 @api_router.delete("/locations/{location_id}")
 async def delete_location(location_id: str):
     """Delete a location"""
@@ -177,16 +373,25 @@ async def delete_location(location_id: str):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Location not found")
     
+    if not EVENT_BUS_ENABLED:
+        await projectors.cascade_location_delete(db, location_id)
+    
     return {"message": "Location deleted successfully"}
 
 # ==================== REVIEW ENDPOINTS ====================
 
-@api_router.post("/reviews", response_model=ReviewResponse)
-async def create_review(review: ReviewCreate):
+@api_router.post("/reviews", response_model=ReviewResponse, dependencies=[rate_limited("create_review")],
+                 openapi_extra=upload_body(ReviewCreate))
+async def create_review(request: Request):
     """Create a new review for a location"""
+    review = await parse_upload(request, ReviewCreate)
+    
     # Verify location exists
     try:
-        location = await db.locations.find_one({"_id": ObjectId(review.location_id)})
+        location = await db.locations.find_one(
+            {"_id": ObjectId(review.location_id)},
+            {"_id": 1}
+        )
     except:
         raise HTTPException(status_code=400, detail="Invalid location ID")
     
@@ -205,17 +410,9 @@ async def create_review(review: ReviewCreate):
     result = await db.reviews.insert_one(review_dict)
     review_dict["id"] = str(result.inserted_id)
     
-    # Update location's average rating
-    all_reviews = await db.reviews.find({"location_id": review.location_id}).to_list(1000)
-    if all_reviews:
-        avg_rating = sum(r["overall_rating"] for r in all_reviews) / len(all_reviews)
-        await db.locations.update_one(
-            {"_id": ObjectId(review.location_id)},
-            {"$set": {
-                "average_rating": round(avg_rating, 1),
-                "total_reviews": len(all_reviews)
-            }}
-        )
+    # Fold the review into the location's summary and average rating
+    if not EVENT_BUS_ENABLED:
+        await projectors.apply_review(db, review_dict)
     
     return ReviewResponse(**review_dict)
 
@@ -231,20 +428,26 @@ async def get_reviews(location_id: str):
     
     return result
 
-@api_router.post("/reviews/{review_id}/helpful")
+@api_router.post("/reviews/{review_id}/helpful", dependencies=[rate_limited("mark_review_helpful")])
 async def mark_review_helpful(review_id: str):
     """Mark a review as helpful"""
     try:
-        result = await db.reviews.update_one(
+        review = await db.reviews.find_one_and_update(
             {"_id": ObjectId(review_id)},
-            {"$inc": {"helpful_count": 1}}
+            {"$inc": {"helpful_count": 1}},
+            projection={"photos": 0},
+            return_document=True  # ReturnDocument.AFTER, without importing pymongo up front
         )
     except:
         raise HTTPException(status_code=400, detail="Invalid review ID")
     
-    if result.modified_count == 0:
+    if review is None:
         raise HTTPException(status_code=404, detail="Review not found")
     
+    # Keep the embedded copies in the location's review summary in step
+    if not EVENT_BUS_ENABLED:
+        await projectors.apply_helpful(db, review)
+    
     return {"message": "Review marked as helpful"}
 
 # ==================== SAVED LOCATIONS ENDPOINTS ====================
@@ -252,21 +455,16 @@ async def mark_review_helpful(review_id: str):
 @api_router.post("/saved")
 async def save_location(data: SavedLocationCreate):
     """Save a location to favorites"""
-    # Check if already saved
-    existing = await db.saved_locations.find_one({
-        "location_id": data.location_id,
-        "user_id": data.user_id
-    })
-    
-    if existing:
+    # Idempotent: the unique (user_id, location_id) index makes this one write
+    result = await db.saved_locations.update_one(
+        {"user_id": data.user_id, "location_id": data.location_id},
+        {"$setOnInsert": {"saved_at": datetime.utcnow()}},
+        upsert=True
+    )
+    
+    if result.upserted_id is None:
         return {"message": "Location already saved", "saved": True}
     
-    await db.saved_locations.insert_one({
-        "location_id": data.location_id,
-        "user_id": data.user_id,
-        "saved_at": datetime.utcnow()
-    })
-    
     return {"message": "Location saved", "saved": True}
 
 @api_router.delete("/saved/{location_id}")
@@ -282,20 +480,19 @@ async def unsave_location(location_id: str, user_id: str = "default_user"):
 @api_router.get("/saved", response_model=List[LocationResponse])
 async def get_saved_locations(user_id: str = "default_user"):
     """Get all saved locations for a user"""
-    saved = await db.saved_locations.find({"user_id": user_id}).to_list(100)
-    saved_ids = [s["location_id"] for s in saved]
-    
-    locations = []
-    for loc_id in saved_ids:
+    saved = await db.saved_locations.find({"user_id": user_id}, {"location_id": 1}).to_list(100)
+    saved_ids = []
+    for s in saved:
         try:
-            loc = await db.locations.find_one({"_id": ObjectId(loc_id)})
-            if loc:
-                loc_data = serialize_doc(loc)
-                locations.append(LocationResponse(**loc_data))
+            saved_ids.append(ObjectId(s["location_id"]))
         except:
             continue
     
-    return locations
+    # One $in query instead of a lookup per saved location, returned in saved order
+    found = await db.locations.find({"_id": {"$in": saved_ids}}, LOCATION_PROJECTION).to_list(len(saved_ids))
+    by_id = {loc["_id"]: loc for loc in found}
+    
+    return [LocationResponse(**serialize_doc(by_id[oid])) for oid in saved_ids if oid in by_id]
 
 @api_router.get("/saved/check/{location_id}")
 async def check_if_saved(location_id: str, user_id: str = "default_user"):
@@ -307,6 +504,104 @@ async def check_if_saved(location_id: str, user_id: str = "default_user"):
     
     return {"saved": saved is not None}
 
+@api_router.post("/saved/check")
+async def check_saved_batch(data: SavedCheckRequest):
+    """Check the saved status of many locations with one query"""
+    saved = await db.saved_locations.find(
+        {"user_id": data.user_id, "location_id": {"$in": data.location_ids}},
+        {"location_id": 1, "_id": 0}
+    ).to_list(len(data.location_ids))
+    saved_ids = {s["location_id"] for s in saved}
+    
+    return {"saved": {loc_id: loc_id in saved_ids for loc_id in data.location_ids}}
+
+# ==================== DEDUPE ENDPOINT ====================
+
+@api_router.post("/dedupe/scan", dependencies=[rate_limited("dedupe_scan")])
+async def scan_duplicate_locations(time_budget_ms: int = 2000, after: Optional[str] = None):
+    """Report duplicate location pairs, scanning for at most time_budget_ms"""
+    try:
+        after_id = ObjectId(after) if after else None
+    except:
+        raise HTTPException(status_code=400, detail="Invalid resume ID")
+    
+    if not await geo_index_ready():
+        raise HTTPException(status_code=503, detail="Duplicate detection unavailable until the geo index exists")
+    
+    time_budget_s = min(max(time_budget_ms, 1), 10000) / 1000.0
+    pairs, scanned, resume_after = await dedupe.scan_duplicates(db, time_budget_s, after_id)
+    
+    return {
+        "pairs": pairs,
+        "scanned": scanned,
+        "resume_after": resume_after,
+        "complete": resume_after is None
+    }
+
+# ==================== OFFLINE PACKS ENDPOINTS ====================
+
+@api_router.get("/packs")
+async def get_packs_manifest():
+    """List the regional offline packs with their versions and hashes"""
+    return await packs.manifest(db)
+
+@api_router.get("/packs/{region}")
+async def download_pack(region: str, request: Request):
+    """Download a regional pack, with Range support for resuming"""
+    # Metadata first: conditional and unsatisfiable requests never need the blob
+    pack = await db.region_packs.find_one({"_id": region}, {"data": 0, "content_hash": 0})
+    if not pack:
+        raise HTTPException(status_code=404, detail="Pack not found")
+    
+    size = pack["size"]
+    etag = '"%s"' % pack["sha256"]
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "X-Pack-Version": str(pack["version"])}
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    # Only resume when the client's partial download is of this same build
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None
+    
+    try:
+        byte_range = packs.parse_range(range_header, size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+    
+    stored = await db.region_packs.find_one({"_id": region, "sha256": pack["sha256"]}, {"data": 1})
+    if stored is None:
+        # Rebuilt between the two reads; start over with the new build
+        return await download_pack(region, request)
+    data = bytes(stored["data"])
+    
+    if byte_range is None:
+        return Response(data, media_type="application/gzip", headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(data[start:end + 1], status_code=206, media_type="application/gzip", headers=headers)
+
+@api_router.post("/packs/rebuild", dependencies=[rate_limited("rebuild_packs")])
+async def rebuild_packs():
+    """Rebuild the packs of regions that changed since the last build"""
+    return await packs.build_packs(db, run_cpu=offloader.run_cpu, only_if_changed=EVENT_BUS_ENABLED)
+
+# ==================== METRICS ENDPOINT ====================
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """Rate limiter, request coalescing, offload executor and event bus counters"""
+    return {
+        "rate_limit": rate_limiter.stats(),
+        "single_flight": {"get_locations": locations_flight.stats()},
+        "offload": offloader.stats(),
+        "event_bus": event_bus.stats() if EVENT_BUS_ENABLED else {"enabled": False},
+    }
+
 # ==================== SEED DATA ENDPOINT ====================
 
 @api_router.post("/seed")
@@ -400,6 +695,8 @@ async def seed_data():
         }
     ]
     
+    for loc in sample_locations:
+        loc["geo"] = dedupe.geo_point(loc["latitude"], loc["longitude"])
     await db.locations.insert_many(sample_locations)
     
     # Add some sample reviews
@@ -440,8 +737,24 @@ async def seed_data():
         }
     ]
     
+    if EVENT_BUS_ENABLED:
+        # The summaries are built below, so the projector must not count these again
+        for review in sample_reviews:
+            review["summarized"] = True
     await db.reviews.insert_many(sample_reviews)
     
+    for loc in locations:
+        loc_reviews = [r for r in sample_reviews if r["location_id"] == str(loc["_id"])]
+        summary = review_summary.build_summary(loc_reviews)
+        await db.locations.update_one(
+            {"_id": loc["_id"]},
+            {"$set": {
+                "review_summary": summary,
+                "average_rating": review_summary.average_rating(summary),
+                "total_reviews": summary["count"]
+            }}
+        )
+    
     return {"message": "Database seeded with sample data", "locations_count": len(sample_locations)}
 
 # Include the router in the main app
@@ -462,6 +775,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def ensure_indexes() -> bool:
+    """Create the indexes; returns whether the geo index duplicate detection needs exists"""
+    # Deferred like the client itself, see mongo.py
+    from pymongo.errors import OperationFailure
+
+    # Each step is attempted on its own so one failure doesn't skip the rest
+    geo_index_ok = False
+    try:
+        # Duplicate detection looks up nearby candidates through this index
+        await db.locations.update_many(
+            {"geo": {"$exists": False}},
+            [{"$set": {"geo": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}]
+        )
+        await db.locations.create_index([("geo", "2dsphere")])
+        geo_index_ok = True
+    except Exception:
+        logger.exception("Geo index setup failed; duplicate detection is skipped until it exists")
+    try:
+        # Summary rebuilds and the location delete cascade look reviews up by location;
+        # the sort keys let the most helpful reviews be read straight off the index
+        await db.reviews.create_index([("location_id", 1), ("helpful_count", -1), ("created_at", -1)])
+    except Exception:
+        logger.exception("Reviews index setup failed")
+    # Saved checks and idempotent saves are answered from this index
+    try:
+        await db.saved_locations.create_index([("user_id", 1), ("location_id", 1)], unique=True)
+    except OperationFailure:
+        logger.warning("Duplicate saved_locations rows prevent the unique index; saves still work without it")
+    except Exception:
+        logger.exception("Saved locations index setup failed")
+    return geo_index_ok
+
+async def geo_index_ready() -> bool:
+    """Wait for startup index setup to finish; False if the geo index couldn't be built"""
+    task = getattr(app.state, "index_task", None)
+    if task is None:
+        return True
+    # Shielded so a cancelled request doesn't cancel the shared setup task
+    return await asyncio.shield(task)
+
+@app.on_event("startup")
+async def start_background_work():
+    # Index setup waits on Mongo, so it runs alongside request handling
+    # instead of holding up the first response
+    app.state.index_task = asyncio.create_task(ensure_indexes())
+    
+    if EVENT_BUS_ENABLED:
+        event_bus.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    if EVENT_BUS_ENABLED:
+        await event_bus.stop()
+    db.close()
+    offloader.shutdown()
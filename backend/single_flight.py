@@ -0,0 +1,43 @@
+"""Request coalescing: concurrent identical reads share one in-flight call."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Runs at most one ``fn()`` per key at a time.
+
+    Callers arriving while a call for the same key is in flight await that
+    call's result instead of starting their own. Nothing is cached once the
+    call finishes, so the next caller always sees fresh data.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.shared += 1
+        # The call runs as its own task and every caller waits through shield(),
+        # so a client disconnecting doesn't cancel the query for everybody else.
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Mark the exception retrieved in case every waiter went away first
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._inflight),
+        }
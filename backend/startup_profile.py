@@ -0,0 +1,126 @@
+"""Startup profiling for the backend.
+
+Reports which of server.py's imports cost the most (from ``python -X
+importtime``), which heavy modules got loaded at import, and how long a
+fresh uvicorn process takes to answer its first ``GET /api/``.
+
+    python startup_profile.py
+
+The database is never needed: the Mongo client is created lazily and
+``/api/`` doesn't touch it, so this runs without a reachable Mongo.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+
+# Modules that must only be imported when a feature actually needs them
+LAZY_MODULES = ("motor", "pymongo", "pandas", "numpy", "boto3")
+
+
+def _env():
+    env = os.environ.copy()
+    env.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+    env.setdefault('DB_NAME', 'doudou_startup_profile')
+    return env
+
+
+def import_profile(top: int = 15):
+    """Direct imports of server.py by cumulative import time, slowest first."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True
+    )
+
+    # Lines are "import time: <self us> | <cumulative us> | <indent><module>",
+    # printed as each import finishes, so children come before their parent
+    total_ms, children, pending = 0.0, [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        indent = len(name) - len(name.lstrip(" ")) - 1
+        entry = {"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000}
+        if indent == 0:
+            if entry["module"] == "server":
+                children = pending
+                total_ms = entry["cumulative_ms"]
+            pending = []
+        elif indent == 2:
+            pending.append(entry)
+
+    children.sort(key=lambda e: e["cumulative_ms"], reverse=True)
+    return {"total_ms": total_ms, "imports": children[:top]}
+
+
+def loaded_modules(names=LAZY_MODULES):
+    """Which of ``names`` are in sys.modules right after importing server."""
+    code = "import json, sys, server; print(json.dumps([n for n in %r if n in sys.modules]))" % (tuple(names),)
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _get(url: str) -> int:
+    with urllib.request.urlopen(url, timeout=1) as response:
+        return response.status
+
+
+def measure_cold_start(timeout: float = 30.0):
+    """Seconds from spawning uvicorn to the first 200 from /api/, plus a warm request."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    url = f"http://127.0.0.1:{port}/api/"
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env()
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError(f"no response from {url} within {timeout}s")
+            try:
+                if _get(url) == 200:
+                    break
+            except OSError:
+                time.sleep(0.02)
+        cold_start_s = time.perf_counter() - started
+
+        warm_started = time.perf_counter()
+        _get(url)
+        warm_ms = (time.perf_counter() - warm_started) * 1000
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+    return {"cold_start_s": round(cold_start_s, 3), "warm_request_ms": round(warm_ms, 2)}
+
+
+def main():
+    profile = import_profile()
+    print(f"import server: {profile['total_ms']:.1f} ms")
+    for entry in profile["imports"]:
+        print(f"  {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+
+    loaded = loaded_modules()
+    print(f"\nheavy modules loaded at import: {', '.join(loaded) or 'none'}")
+
+    cold = measure_cold_start()
+    print(f"\ncold start to first /api/ response: {cold['cold_start_s']:.3f} s")
+    print(f"warm /api/ request: {cold['warm_request_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
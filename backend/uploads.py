@@ -0,0 +1,61 @@
+"""Request bodies that carry base64 photos, and their parsing.
+
+A body with a few photos is megabytes of JSON. Parsing it, validating it
+against the model and decoding the photos is CPU-bound, so server.py hands
+large bodies to the process pool through ``parse_upload`` instead of letting
+FastAPI parse them on the event loop. The models live here rather than in
+server.py so worker processes can unpickle them without importing the app.
+"""
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel, Field, ValidationError
+
+import photos
+
+# Smaller bodies are parsed inline: shipping them to a worker costs more
+INLINE_BODY_BYTES = 64 * 1024
+
+
+class LocationCreate(BaseModel):
+    name: str
+    address: str
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    location_type: str  # cafe, restaurant, park, library, etc.
+    privacy_level: str  # private, semi-private, public
+    requires_purchase: bool = False
+    description: Optional[str] = None
+    amenities: List[str] = []  # changing_table, high_chairs, quiet_area, etc.
+    photos: List[str] = []  # base64 encoded images
+    owner_id: Optional[str] = None
+
+
+class ReviewCreate(BaseModel):
+    location_id: str
+    staff_rating: int  # 1-5
+    comfort_rating: int  # 1-5
+    privacy_rating: int  # 1-5
+    safety_rating: int  # 1-5
+    would_return: bool
+    comment: Optional[str] = None
+    issues: List[str] = []  # red flags
+    photos: List[str] = []  # base64 encoded images
+    anonymous: bool = False
+    reviewer_name: Optional[str] = None
+
+
+def parse_upload(model, body: bytes) -> Tuple[Optional[BaseModel], Optional[List[dict]]]:
+    """Parse and validate ``body`` as ``model`` and check its photos.
+
+    Returns ``(item, None)``, or ``(None, errors)`` with FastAPI-style
+    validation errors, since pydantic's ValidationError doesn't survive the
+    trip back from a worker process. Raises ValueError for a bad photo.
+    """
+    try:
+        item = model.model_validate_json(body)
+    except ValidationError as e:
+        # Without the input: it may be a photo, which would be shipped back
+        errors = e.errors(include_url=False, include_input=False)
+        return None, [dict(error, loc=("body",) + tuple(error["loc"])) for error in errors]
+    photos.validate_photos(item.photos)
+    return item, None
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Latency benchmarks for the Doudou backend
+- Detail screen: sequential /detail and saved-check calls vs the composite
+  /view endpoint
+- Mixed load: tail latency of light requests while photo-laden reviews
+  are being posted (run the server with RATE_LIMITS_ENABLED=false, and
+  reseed afterwards since the heavy requests create reviews)
+"""
+
+import base64
+import os
+import requests
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Backend URL from environment
+BACKEND_URL = "https://lactation-finder.preview.emergentagent.com/api"
+
+ITERATIONS = 30
+
+LIGHT_REQUESTS = 200
+HEAVY_REQUESTS = 20
+PHOTO_BYTES = 3 * 1024 * 1024
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, samples):
+    print(f"{name:<28} p50 {percentile(samples, 50):7.1f} ms   "
+          f"p95 {percentile(samples, 95):7.1f} ms   p99 {percentile(samples, 99):7.1f} ms   "
+          f"mean {statistics.mean(samples):7.1f} ms")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_detail_view(session, location_id):
+    """Sequential detail and saved-check calls vs one composite call"""
+    def sequential():
+        session.get(f"{BACKEND_URL}/locations/{location_id}/detail").raise_for_status()
+        session.get(f"{BACKEND_URL}/saved/check/{location_id}").raise_for_status()
+
+    def composite():
+        session.get(f"{BACKEND_URL}/locations/{location_id}/view").raise_for_status()
+
+    # Warm up connections before measuring
+    sequential()
+    composite()
+
+    sequential_ms = [timed(sequential) for _ in range(ITERATIONS)]
+    composite_ms = [timed(composite) for _ in range(ITERATIONS)]
+
+    print("\n📊 Detail screen load")
+    report("sequential (2 calls)", sequential_ms)
+    report("composite /view", composite_ms)
+    saved = 1 - statistics.median(composite_ms) / statistics.median(sequential_ms)
+    print(f"median latency reduction: {saved:.0%}")
+
+
+def bench_mixed_load(location_id):
+    """Light GET /api/ latency alone, then alongside heavy photo uploads"""
+    photo = base64.b64encode(b"\xff\xd8\xff" + os.urandom(PHOTO_BYTES)).decode()
+    review = {
+        "location_id": location_id,
+        "staff_rating": 4,
+        "comfort_rating": 4,
+        "privacy_rating": 4,
+        "safety_rating": 4,
+        "would_return": True,
+        "comment": "Benchmark review",
+        "photos": [photo, photo],
+        "reviewer_name": "Benchmark"
+    }
+
+    def light(_):
+        return timed(lambda: requests.get(f"{BACKEND_URL}/").raise_for_status())
+
+    def heavy(_):
+        return timed(lambda: requests.post(f"{BACKEND_URL}/reviews", json=review).raise_for_status())
+
+    with ThreadPoolExecutor(8) as pool:
+        idle_ms = list(pool.map(light, range(LIGHT_REQUESTS)))
+
+    with ThreadPoolExecutor(8) as light_pool, ThreadPoolExecutor(4) as heavy_pool:
+        heavy_futures = [heavy_pool.submit(heavy, i) for i in range(HEAVY_REQUESTS)]
+        loaded_ms = list(light_pool.map(light, range(LIGHT_REQUESTS)))
+        heavy_ms = [f.result() for f in heavy_futures]
+
+    print("\n📊 Mixed load")
+    report("light, idle server", idle_ms)
+    report("light, during uploads", loaded_ms)
+    report("heavy photo reviews", heavy_ms)
+
+    metrics = requests.get(f"{BACKEND_URL}/metrics").json()
+    for stage, stats in metrics.get("offload", {}).get("stages", {}).items():
+        print(f"{stage:<28} {stats['pool']} pool, queue wait p95 {stats['queue_wait']['p95_ms']} ms, "
+              f"run p95 {stats['run_time']['p95_ms']} ms")
+
+
+def main():
+    """Main benchmark execution"""
+    session = requests.Session()
+    print(f"🔗 Backend URL: {BACKEND_URL}")
+
+    response = session.get(f"{BACKEND_URL}/locations")
+    if response.status_code != 200 or not response.json():
+        print("❌ No locations available - seed the database first")
+        sys.exit(1)
+    location_id = response.json()[0]["id"]
+
+    bench_detail_view(session, location_id)
+    bench_mixed_load(location_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -98,7 +98,27 @@ class DoudouAPITester:
     
     def test_create_location(self):
         """Test POST /api/locations"""
-        new_location = {
+        new_location = self.new_location_data()
+        
+        try:
+            response = self.session.post(f"{self.base_url}/locations", json=new_location)
+            
+            if response.status_code == 200:
+                location_data = response.json()
+                self.created_location_id = location_data.get("id")
+                self.log_test("Create Location", True, f"Location created with ID: {self.created_location_id}")
+                return location_data
+            else:
+                self.log_test("Create Location", False, f"Failed with status {response.status_code}: {response.text}")
+                return None
+                
+        except Exception as e:
+            self.log_test("Create Location", False, f"Exception occurred: {str(e)}")
+            return None
+    
+    def new_location_data(self):
+        """Payload used to create the test location"""
+        return {
             "name": "Mama Bear Nursing Lounge",
             "address": "456 Rue de Rivoli, Paris 75001",
             "latitude": 48.8606,
@@ -110,21 +130,62 @@ class DoudouAPITester:
             "amenities": ["private_room", "comfortable_seating", "changing_table", "wifi"],
             "photos": []
         }
+    
+    def test_reject_duplicate_location(self):
+        """Test POST /api/locations rejects an exact duplicate"""
+        duplicate = self.new_location_data()
+        duplicate["name"] = "mama bear nursing lounge!"
+        duplicate["latitude"] += 0.0001  # ~11m away
         
         try:
-            response = self.session.post(f"{self.base_url}/locations", json=new_location)
+            response = self.session.post(f"{self.base_url}/locations", json=duplicate)
+            
+            if response.status_code == 409:
+                existing = response.json()["detail"]["duplicate_of"]
+                self.log_test("Reject Duplicate Location", True, f"Duplicate of {existing['id']} rejected")
+                return True
+            else:
+                self.log_test("Reject Duplicate Location", False, f"Expected 409, got {response.status_code}: {response.text}")
+                return False
+                
+        except Exception as e:
+            self.log_test("Reject Duplicate Location", False, f"Exception occurred: {str(e)}")
+            return False
+    
+    def test_reject_invalid_coordinates(self):
+        """Test POST /api/locations rejects out-of-range coordinates"""
+        invalid = self.new_location_data()
+        invalid["latitude"] = 91.0
+        
+        try:
+            response = self.session.post(f"{self.base_url}/locations", json=invalid)
+            
+            if response.status_code == 422:
+                self.log_test("Reject Invalid Coordinates", True, "Latitude 91 rejected")
+                return True
+            else:
+                self.log_test("Reject Invalid Coordinates", False, f"Expected 422, got {response.status_code}: {response.text}")
+                return False
+                
+        except Exception as e:
+            self.log_test("Reject Invalid Coordinates", False, f"Exception occurred: {str(e)}")
+            return False
+    
+    def test_dedupe_scan(self):
+        """Test POST /api/dedupe/scan"""
+        try:
+            response = self.session.post(f"{self.base_url}/dedupe/scan", params={"time_budget_ms": 5000})
             
             if response.status_code == 200:
-                location_data = response.json()
-                self.created_location_id = location_data.get("id")
-                self.log_test("Create Location", True, f"Location created with ID: {self.created_location_id}")
-                return location_data
+                result = response.json()
+                self.log_test("Dedupe Scan", True, f"Scanned {result['scanned']} locations, {len(result['pairs'])} duplicate pairs, complete={result['complete']}")
+                return result
             else:
-                self.log_test("Create Location", False, f"Failed with status {response.status_code}: {response.text}")
+                self.log_test("Dedupe Scan", False, f"Failed with status {response.status_code}: {response.text}")
                 return None
                 
         except Exception as e:
-            self.log_test("Create Location", False, f"Exception occurred: {str(e)}")
+            self.log_test("Dedupe Scan", False, f"Exception occurred: {str(e)}")
             return None
     
     def test_get_single_location(self, location_id):
@@ -216,6 +277,49 @@ class DoudouAPITester:
             self.log_test("Mark Review Helpful", False, f"Exception occurred: {str(e)}")
             return False
     
+    def test_get_location_detail(self, location_id):
+        """Test GET /api/locations/{location_id}/detail"""
+        try:
+            response = self.session.get(f"{self.base_url}/locations/{location_id}/detail")
+            
+            if response.status_code == 200:
+                detail = response.json()
+                summary = detail.get("summary", {})
+                if detail.get("location", {}).get("id") == location_id and "rating_histogram" in summary:
+                    self.log_test("Get Location Detail", True, f"Summary covers {summary.get('total_reviews', 0)} reviews, {len(summary.get('latest_reviews', []))} embedded")
+                    return detail
+                else:
+                    self.log_test("Get Location Detail", False, "Location or review summary missing from response")
+                    return None
+            else:
+                self.log_test("Get Location Detail", False, f"Failed with status {response.status_code}: {response.text}")
+                return None
+                
+        except Exception as e:
+            self.log_test("Get Location Detail", False, f"Exception occurred: {str(e)}")
+            return None
+    
+    def test_get_location_view(self, location_id):
+        """Test GET /api/locations/{location_id}/view"""
+        try:
+            response = self.session.get(f"{self.base_url}/locations/{location_id}/view",
+                                      params={"user_id": "test_user_emma"})
+            
+            if response.status_code == 200:
+                view = response.json()
+                if view.get("errors"):
+                    self.log_test("Get Location View", False, f"Partial response: {view['errors']}")
+                    return view
+                self.log_test("Get Location View", True, f"Location with {view['summary']['total_reviews']} reviews, saved={view.get('saved')}")
+                return view
+            else:
+                self.log_test("Get Location View", False, f"Failed with status {response.status_code}: {response.text}")
+                return None
+                
+        except Exception as e:
+            self.log_test("Get Location View", False, f"Exception occurred: {str(e)}")
+            return None
+    
     def test_save_location(self, location_id):
         """Test POST /api/saved"""
         save_data = {
@@ -257,6 +361,28 @@ class DoudouAPITester:
             self.log_test("Check If Saved", False, f"Exception occurred: {str(e)}")
             return False
     
+    def test_check_saved_batch(self, location_ids):
+        """Test POST /api/saved/check"""
+        try:
+            response = self.session.post(f"{self.base_url}/saved/check",
+                                       json={"location_ids": location_ids, "user_id": "test_user_emma"})
+            
+            if response.status_code == 200:
+                saved = response.json().get("saved", {})
+                if set(saved) == set(location_ids):
+                    self.log_test("Check Saved Batch", True, f"{sum(saved.values())}/{len(saved)} locations saved")
+                    return saved
+                else:
+                    self.log_test("Check Saved Batch", False, f"Expected a status for each of {len(location_ids)} ids, got {len(saved)}")
+                    return {}
+            else:
+                self.log_test("Check Saved Batch", False, f"Failed with status {response.status_code}: {response.text}")
+                return {}
+                
+        except Exception as e:
+            self.log_test("Check Saved Batch", False, f"Exception occurred: {str(e)}")
+            return {}
+    
     def test_get_saved_locations(self):
         """Test GET /api/saved"""
         try:
@@ -311,6 +437,75 @@ class DoudouAPITester:
             self.log_test("Delete Location", False, f"Exception occurred: {str(e)}")
             return False
     
+    def test_deleted_location_cleanup(self, location_id):
+        """Test that deleting a location removes its reviews"""
+        try:
+            response = self.session.get(f"{self.base_url}/reviews/{location_id}")
+            
+            if response.status_code == 200 and response.json() == []:
+                self.log_test("Deleted Location Cleanup", True, "No orphaned reviews left behind")
+                return True
+            else:
+                self.log_test("Deleted Location Cleanup", False, f"Status {response.status_code}, {len(response.json())} reviews still present")
+                return False
+                
+        except Exception as e:
+            self.log_test("Deleted Location Cleanup", False, f"Exception occurred: {str(e)}")
+            return False
+    
+    def test_offline_packs(self):
+        """Test POST /api/packs/rebuild, GET /api/packs and ranged GET /api/packs/{region}"""
+        try:
+            response = self.session.post(f"{self.base_url}/packs/rebuild")
+            if response.status_code != 200:
+                self.log_test("Offline Packs", False, f"Rebuild failed with status {response.status_code}: {response.text}")
+                return False
+            
+            response = self.session.get(f"{self.base_url}/packs")
+            if response.status_code != 200:
+                self.log_test("Offline Packs", False, f"Manifest failed with status {response.status_code}: {response.text}")
+                return False
+            
+            manifest = response.json()
+            if not manifest.get("packs"):
+                self.log_test("Offline Packs", False, "Manifest lists no packs")
+                return False
+            
+            pack = manifest["packs"][0]
+            response = self.session.get(f"{self.base_url}/packs/{pack['region']}", headers={"Range": "bytes=0-9"})
+            if response.status_code == 206 and len(response.content) == min(10, pack["size"]):
+                self.log_test("Offline Packs", True, f"{len(manifest['packs'])} packs listed, ranged download of {pack['region']} returned 206")
+                return True
+            else:
+                self.log_test("Offline Packs", False, f"Ranged download returned status {response.status_code} with {len(response.content)} bytes")
+                return False
+                
+        except Exception as e:
+            self.log_test("Offline Packs", False, f"Exception occurred: {str(e)}")
+            return False
+    
+    def test_metrics(self):
+        """Test GET /api/metrics"""
+        try:
+            response = self.session.get(f"{self.base_url}/metrics")
+            
+            if response.status_code == 200:
+                metrics = response.json()
+                if "rate_limit" in metrics and "single_flight" in metrics:
+                    rejected = sum(metrics["rate_limit"]["rejected"].values())
+                    self.log_test("Get Metrics", True, f"Metrics returned, {rejected} rate-limited requests")
+                    return metrics
+                else:
+                    self.log_test("Get Metrics", False, "Missing rate_limit or single_flight counters")
+                    return None
+            else:
+                self.log_test("Get Metrics", False, f"Failed with status {response.status_code}: {response.text}")
+                return None
+                
+        except Exception as e:
+            self.log_test("Get Metrics", False, f"Exception occurred: {str(e)}")
+            return None
+    
     def run_all_tests(self):
         """Run complete test suite"""
         print(f"🧪 Starting Doudou API Tests")
@@ -340,6 +535,10 @@ class DoudouAPITester:
         # 5. Test creating new location
         new_location = self.test_create_location()
         test_location_id = self.created_location_id or first_location_id
+        if self.created_location_id:
+            self.test_reject_duplicate_location()
+        self.test_reject_invalid_coordinates()
+        self.test_dedupe_scan()
         
         # 6. Test reviews
         new_review = self.test_create_review(test_location_id)
@@ -348,15 +547,26 @@ class DoudouAPITester:
         if self.created_review_id:
             self.test_mark_review_helpful(self.created_review_id)
         
+        self.test_get_location_detail(test_location_id)
+        self.test_get_location_view(test_location_id)
+        
         # 7. Test saved locations
         self.test_save_location(test_location_id)
         self.test_check_if_saved(test_location_id)
+        self.test_check_saved_batch([loc["id"] for loc in locations] + [test_location_id])
         self.test_get_saved_locations()
         self.test_unsave_location(test_location_id)
         
         # 8. Test deletion (only if we created a location)
         if self.created_location_id:
-            self.test_delete_location(self.created_location_id)
+            if self.test_delete_location(self.created_location_id):
+                self.test_deleted_location_cleanup(self.created_location_id)
+        
+        # 9. Test offline packs
+        self.test_offline_packs()
+        
+        # 10. Test metrics
+        self.test_metrics()
         
         # Summary
         print("\n" + "=" * 60)
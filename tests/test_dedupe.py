@@ -0,0 +1,78 @@
+"""Unit tests for backend/dedupe.py."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import dedupe  # noqa: E402
+
+
+def location(name, latitude=48.8606, longitude=2.3376, _id="b"):
+    return {"_id": _id, "name": name, "address": "1 Rue de Rivoli", "latitude": latitude, "longitude": longitude}
+
+
+def test_normalize_name_ignores_case_accents_punctuation_and_word_order():
+    assert dedupe.normalize_name("Café Le Petit-Jardin!") == dedupe.normalize_name("le petit jardin cafe")
+
+
+def test_normalize_name_keeps_non_latin_letters():
+    assert dedupe.normalize_name("北京咖啡") == "北京咖啡"
+    assert dedupe.normalize_name("Кафе «Пушкин»") == "кафе пушкин"
+    assert dedupe.normalize_name("!!!") == ""
+
+
+def test_name_similarity_thresholds():
+    assert dedupe.name_similarity("Le Petit Jardin Café", "Le Petit Jardin Café") == 1.0
+    assert dedupe.name_similarity("Le Petit Jardin Café", "Petit Jardin Cafe") >= dedupe.MERGE_SIMILARITY
+    assert dedupe.name_similarity("Mama's Kitchen", "Mamas Kitchen Restaurant") < dedupe.MERGE_SIMILARITY
+    assert dedupe.name_similarity("Le Petit Jardin Café", "Family Park Gardens") < 0.1
+    assert dedupe.name_similarity("", "Anything") == 0.0
+    assert dedupe.name_similarity("...", "!!!") == 0.0
+
+
+def test_distance_m():
+    # 0.001 degrees of latitude is about 111m
+    assert dedupe.distance_m(48.8606, 2.3376, 48.8616, 2.3376) == pytest.approx(111.2, abs=0.5)
+
+
+def test_same_name_close_by_is_exact():
+    match = dedupe.compare(location("Mama Bear Lounge", _id="a"), location("mama bear lounge!", latitude=48.8607))
+
+    assert match["exact"]
+    assert match["id"] == "b"
+    assert match["distance_m"] < dedupe.EXACT_RADIUS_M
+    assert match["similarity"] == 1.0
+
+
+def test_same_name_beyond_exact_radius_is_a_candidate():
+    match = dedupe.compare(location("Mama Bear Lounge", _id="a"), location("Mama Bear Lounge", latitude=48.8616))
+
+    assert not match["exact"]
+    assert match["distance_m"] > dedupe.EXACT_RADIUS_M
+
+
+def test_similar_name_close_by_is_a_candidate():
+    match = dedupe.compare(location("Le Petit Jardin Café", _id="a"), location("Petit Jardin Cafe"))
+
+    assert not match["exact"]
+    assert match["similarity"] >= dedupe.MERGE_SIMILARITY
+
+
+def test_unrelated_name_is_not_a_match():
+    assert dedupe.compare(location("Le Petit Jardin Café", _id="a"), location("Family Park Gardens")) is None
+
+
+def test_different_non_latin_names_close_by_are_not_matched():
+    assert dedupe.compare(location("北京咖啡", _id="a"), location("東京喫茶", latitude=48.8607)) is None
+
+
+def test_same_non_latin_name_close_by_is_exact():
+    match = dedupe.compare(location("北京咖啡", _id="a"), location("北京咖啡!", latitude=48.8607))
+
+    assert match["exact"]
+
+
+def test_names_without_letters_are_never_exact():
+    assert dedupe.compare(location("???", _id="a"), location("!!!", latitude=48.8607)) is None
@@ -0,0 +1,104 @@
+"""Unit tests for backend/fanout.py."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from fanout import fan_out  # noqa: E402
+
+
+def test_all_calls_succeed():
+    async def value(v):
+        await asyncio.sleep(0)
+        return v
+
+    outcome = asyncio.run(fan_out({"a": lambda: value(1), "b": lambda: value(2)}, timeout=1.0, max_concurrency=4))
+
+    assert outcome.results == {"a": 1, "b": 2}
+    assert outcome.errors == {}
+    assert not outcome.partial
+
+
+def test_failed_call_is_reported_without_failing_the_others():
+    async def ok():
+        return "ok"
+
+    async def broken():
+        raise KeyError("missing")
+
+    outcome = asyncio.run(fan_out({"ok": ok, "broken": broken}, timeout=1.0, max_concurrency=4))
+
+    assert outcome.results == {"ok": "ok"}
+    assert outcome.errors == {"broken": "KeyError"}
+    assert outcome.partial
+
+
+def test_slow_call_times_out_and_is_cancelled():
+    cancelled = []
+
+    async def scenario():
+        async def fast():
+            return "fast"
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        outcome = await fan_out({"fast": fast, "slow": slow}, timeout=0.05, max_concurrency=4)
+        # Let the cancellation reach the slow call
+        await asyncio.sleep(0)
+        return outcome
+
+    outcome = asyncio.run(scenario())
+
+    assert outcome.results == {"fast": "fast"}
+    assert outcome.errors == {"slow": "timeout"}
+    assert cancelled == [True]
+
+
+def test_concurrency_budget_is_respected():
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return True
+
+    calls = {str(i): call for i in range(6)}
+    outcome = asyncio.run(fan_out(calls, timeout=1.0, max_concurrency=2))
+
+    assert len(outcome.results) == 6
+    assert peak == 2
+
+
+def test_cancelling_the_caller_cancels_running_calls():
+    cancelled = []
+
+    async def scenario():
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        caller = asyncio.ensure_future(fan_out({"slow": slow}, timeout=10, max_concurrency=1))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        # Checked before asyncio.run cancels whatever is still left over
+        return list(cancelled)
+
+    assert asyncio.run(scenario()) == [True]
@@ -0,0 +1,68 @@
+"""Unit tests for backend/offload.py."""
+import asyncio
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from offload import Offloader  # noqa: E402
+
+
+def run(offloader, coro):
+    try:
+        return asyncio.run(coro)
+    finally:
+        offloader.shutdown()
+
+
+def test_run_cpu_uses_the_process_pool_and_records_stats():
+    offloader = Offloader(thread_workers=1, process_workers=1)
+
+    result = run(offloader, offloader.run_cpu("factorial", math.factorial, 20))
+
+    assert result == math.factorial(20)
+    stats = offloader.stats()["stages"]["factorial"]
+    assert stats["pool"] == "process"
+    assert (stats["submitted"], stats["completed"], stats["failed"], stats["queue_depth"]) == (1, 1, 0, 0)
+    assert stats["run_time"]["max_ms"] >= 0
+
+
+def test_no_process_workers_falls_back_to_threads():
+    offloader = Offloader(thread_workers=1, process_workers=0)
+
+    async def scenario():
+        return [await offloader.run_cpu("sum", sum, [i, 1]) for i in range(3)]
+
+    assert run(offloader, scenario()) == [1, 2, 3]
+    stats = offloader.stats()
+    assert stats["stages"]["sum"]["pool"] == "thread"
+    assert stats["stages"]["sum"]["completed"] == 3
+    assert offloader._processes is None
+
+
+def test_failures_are_counted_and_raised():
+    offloader = Offloader(thread_workers=1, process_workers=0)
+
+    with pytest.raises(ValueError):
+        run(offloader, offloader.run_cpu("parse", int, "not a number"))
+
+    stats = offloader.stats()["stages"]["parse"]
+    assert (stats["submitted"], stats["completed"], stats["failed"], stats["queue_depth"]) == (1, 0, 1, 0)
+    assert stats["run_time"]["max_ms"] == 0.0
+
+
+def test_stages_are_tracked_separately():
+    offloader = Offloader(thread_workers=2, process_workers=0)
+
+    async def scenario():
+        await asyncio.gather(offloader.run_cpu("a", abs, -1), offloader.run_cpu("b", abs, -2))
+        await offloader.run_cpu("a", abs, -3)
+
+    run(offloader, scenario())
+
+    stages = offloader.stats()["stages"]
+    assert stages["a"]["completed"] == 2
+    assert stages["b"]["completed"] == 1
@@ -0,0 +1,158 @@
+"""Unit tests for backend/packs.py."""
+import asyncio
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import packs  # noqa: E402
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return list(self.docs)
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """Just enough of a Motor collection for build_packs, keyed by _id."""
+
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+        self.replaced = []
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(list(self.docs.values()))
+
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.replaced.append(query["_id"])
+        self.docs[query["_id"]] = doc
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {"_id": query["_id"]}).update(update["$set"])
+
+    async def delete_many(self, query):
+        for key in query["_id"]["$in"]:
+            self.docs.pop(key, None)
+
+
+class FakeDb:
+    def __init__(self, locations):
+        self.locations = FakeCollection(locations)
+        self.region_packs = FakeCollection()
+        self.derived_state = FakeCollection()
+
+
+def location(n, latitude, longitude, name=None):
+    return {
+        "_id": "loc%d" % n,
+        "name": name or "Location %d" % n,
+        "address": "Somewhere",
+        "latitude": latitude,
+        "longitude": longitude,
+        "location_type": "cafe",
+        "privacy_level": "public",
+    }
+
+
+PARIS = (48.8606, 2.3376)
+LONDON = (51.5072, -0.1276)
+
+
+def test_geohash():
+    assert packs.geohash(42.6, -5.6, precision=5) == "ezs42"
+    assert packs.geohash(*PARIS) != packs.geohash(*LONDON)
+    assert packs.geohash(*PARIS, precision=6).startswith(packs.geohash(*PARIS))
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=900-", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert packs.parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-1001", "bytes=50-10", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        packs.parse_range(header, 1000)
+
+
+def test_build_packs_only_rewrites_changed_regions():
+    db = FakeDb([location(1, *PARIS), location(2, *LONDON)])
+    paris, london = packs.geohash(*PARIS), packs.geohash(*LONDON)
+
+    first = asyncio.run(packs.build_packs(db))
+    assert first["built"] == sorted([paris, london])
+    assert db.region_packs.docs[paris]["version"] == 1
+
+    db.region_packs.replaced.clear()
+    second = asyncio.run(packs.build_packs(db))
+    assert second["built"] == []
+    assert second["unchanged"] == sorted([paris, london])
+    assert db.region_packs.replaced == []
+
+    db.locations.docs["loc1"]["name"] = "Renamed"
+    third = asyncio.run(packs.build_packs(db))
+    assert third["built"] == [paris]
+    assert third["unchanged"] == [london]
+    assert db.region_packs.docs[paris]["version"] == 2
+    assert db.region_packs.docs[london]["version"] == 1
+
+    payload = json.loads(gzip.decompress(db.region_packs.docs[paris]["data"]))
+    assert [entry["name"] for entry in payload["locations"]] == ["Renamed"]
+
+
+def test_build_packs_removes_emptied_regions():
+    db = FakeDb([location(1, *PARIS), location(2, *LONDON)])
+    asyncio.run(packs.build_packs(db))
+
+    del db.locations.docs["loc2"]
+    result = asyncio.run(packs.build_packs(db))
+
+    assert result["removed"] == [packs.geohash(*LONDON)]
+    assert list(db.region_packs.docs) == [packs.geohash(*PARIS)]
+
+
+def test_build_packs_skips_when_nothing_changed_since_last_build():
+    db = FakeDb([location(1, *PARIS)])
+    db.derived_state.docs["region_packs"] = {"_id": "region_packs", "version": 3, "built_version": 3}
+
+    result = asyncio.run(packs.build_packs(db, only_if_changed=True))
+
+    assert result["skipped"]
+    assert db.region_packs.docs == {}
+
+
+def test_encode_pack_is_stable_for_identical_payloads():
+    payload = {"region": "u09t", "locations": [{"id": "a"}]}
+
+    assert packs.encode_pack(payload) == packs.encode_pack(dict(payload))
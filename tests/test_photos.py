@@ -0,0 +1,81 @@
+"""Unit tests for backend/photos.py and backend/uploads.py."""
+import base64
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import photos  # noqa: E402
+import uploads  # noqa: E402
+
+JPEG = base64.b64encode(b"\xff\xd8\xff" + b"\x00" * 64).decode()
+PNG = base64.b64encode(b"\x89PNG\r\n\x1a\n" + b"\x00" * 64).decode()
+
+
+def test_plain_base64_and_data_uris_are_accepted():
+    photos.validate_photos([JPEG, "data:image/png;base64," + PNG])
+
+
+@pytest.mark.parametrize("photo, message", [
+    ("data:image/png;base64", "without a payload"),
+    ("not base64!", "not valid base64"),
+    (base64.b64encode(b"plain text").decode(), "not a supported image"),
+])
+def test_bad_photos_raise_value_error(photo, message):
+    with pytest.raises(ValueError, match=message):
+        photos.validate_photos([JPEG, photo])
+
+
+def test_oversized_photo_is_rejected_before_decoding():
+    with pytest.raises(ValueError, match="larger than"):
+        photos.validate_photos(["A" * 2000], max_bytes=1000)
+
+
+def test_too_many_photos():
+    with pytest.raises(ValueError, match="At most"):
+        photos.validate_photos([JPEG] * (photos.MAX_PHOTOS + 1))
+
+
+def review_body(**overrides):
+    review = {
+        "location_id": "abc",
+        "staff_rating": 5,
+        "comfort_rating": 4,
+        "privacy_rating": 4,
+        "safety_rating": 5,
+        "would_return": True,
+        "photos": [JPEG],
+    }
+    review.update(overrides)
+    return json.dumps(review).encode()
+
+
+def test_parse_upload_returns_the_model():
+    item, errors = uploads.parse_upload(uploads.ReviewCreate, review_body())
+
+    assert errors is None
+    assert isinstance(item, uploads.ReviewCreate)
+    assert item.photos == [JPEG]
+
+
+def test_parse_upload_reports_validation_errors_under_body():
+    item, errors = uploads.parse_upload(uploads.ReviewCreate, review_body(staff_rating="five"))
+
+    assert item is None
+    assert [error["loc"] for error in errors] == [("body", "staff_rating")]
+    assert all("input" not in error for error in errors)
+
+
+def test_parse_upload_reports_invalid_json():
+    item, errors = uploads.parse_upload(uploads.ReviewCreate, b"{not json")
+
+    assert item is None
+    assert errors[0]["type"] == "json_invalid"
+
+
+def test_parse_upload_checks_photos():
+    with pytest.raises(ValueError, match="not valid base64"):
+        uploads.parse_upload(uploads.ReviewCreate, review_body(photos=["not base64!"]))
@@ -0,0 +1,81 @@
+"""Unit tests for backend/rate_limit.py."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from rate_limit import RateLimiter, client_key  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_reject_with_retry_after():
+    clock = FakeClock()
+    limiter = RateLimiter({"helpful": (10, 0.2)}, clock=clock)
+
+    results = [limiter.acquire("helpful", "1.2.3.4") for _ in range(15)]
+
+    assert results[:10] == [None] * 10
+    assert all(r is not None and r > 0 for r in results[10:])
+    assert limiter.stats()["rejected"]["helpful"] == 5
+
+
+def test_bucket_refills_over_time():
+    clock = FakeClock()
+    limiter = RateLimiter({"r": (1, 0.5)}, clock=clock)
+
+    assert limiter.acquire("r", "a") is None
+    assert limiter.acquire("r", "a") == 2.0
+    clock.now = 2.0
+    assert limiter.acquire("r", "a") is None
+
+
+def test_routes_and_clients_have_separate_buckets():
+    limiter = RateLimiter({"a": (1, 0.01), "b": (1, 0.01)}, clock=FakeClock())
+
+    assert limiter.acquire("a", "x") is None
+    assert limiter.acquire("b", "x") is None
+    assert limiter.acquire("a", "y") is None
+    assert limiter.acquire("a", "x") is not None
+
+
+def test_store_is_bounded():
+    limiter = RateLimiter({"r": (1, 0.01)}, max_keys=2, clock=FakeClock())
+    for client in ("a", "b", "c"):
+        limiter.acquire("r", client)
+
+    assert limiter.stats()["tracked_clients"] == 2
+    assert limiter.stats()["evicted"] == 1
+
+
+def test_client_key_uses_entry_appended_by_trusted_proxy():
+    assert client_key("203.0.113.9", "10.0.0.1", 1) == "203.0.113.9"
+    assert client_key("6.6.6.6, 203.0.113.9", "10.0.0.1", 1) == "203.0.113.9"
+    assert client_key("6.6.6.6, 203.0.113.9, 10.1.1.1", "10.0.0.1", 2) == "203.0.113.9"
+
+
+def test_client_key_falls_back_to_peer():
+    assert client_key(None, "198.51.100.7", 1) == "198.51.100.7"
+    assert client_key("6.6.6.6", "198.51.100.7", 0) == "198.51.100.7"
+    assert client_key("6.6.6.6", "198.51.100.7", 2) == "198.51.100.7"
+    assert client_key(None, None, 1) == "unknown"
+
+
+def test_spoofed_forwarded_for_does_not_reset_bucket():
+    limiter = RateLimiter({"helpful": (10, 0.2)}, clock=FakeClock())
+
+    rejected = 0
+    for i in range(15):
+        # The client rotates its own X-Forwarded-For; the ingress appends the real address
+        key = client_key(f"10.9.9.{i}, 203.0.113.9", "10.0.0.1", 1)
+        if limiter.acquire("helpful", key) is not None:
+            rejected += 1
+
+    assert rejected == 5
+    assert limiter.stats()["tracked_clients"] == 1
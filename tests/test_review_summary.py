@@ -0,0 +1,101 @@
+"""Unit tests for backend/review_summary.py."""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import review_summary  # noqa: E402
+
+START = datetime(2024, 1, 1)
+
+
+def review(n, overall=4.0, helpful=0, issues=(), would_return=True):
+    return {
+        "_id": "r%d" % n,
+        "location_id": "loc",
+        "staff_rating": 4,
+        "comfort_rating": 4,
+        "privacy_rating": 4,
+        "safety_rating": 4,
+        "overall_rating": overall,
+        "would_return": would_return,
+        "issues": list(issues),
+        "photos": ["base64..."],
+        "helpful_count": helpful,
+        "created_at": START + timedelta(minutes=n),
+    }
+
+
+@pytest.mark.parametrize("overall, bucket", [(1.0, "1"), (0.5, "1"), (2.49, "2"), (2.5, "3"), (4.75, "5"), (5.0, "5")])
+def test_histogram_bucket(overall, bucket):
+    assert review_summary.histogram_bucket(overall) == bucket
+
+
+@pytest.mark.parametrize("flag, key", [("no.privacy", "no_privacy"), ("$where", "where"), ("$", "_"), ("rude_staff", "rude_staff")])
+def test_issue_key_makes_safe_field_names(flag, key):
+    assert review_summary.issue_key(flag) == key
+
+
+def test_summary_increment():
+    update = review_summary.summary_increment(review(1, overall=3.75, issues=["a.b", "a.b"], would_return=False))
+
+    inc = update["$inc"]
+    assert inc["review_summary.count"] == 1
+    assert inc["review_summary.rating_sums.overall"] == 3.75
+    assert inc["review_summary.histogram.4"] == 1
+    assert inc["review_summary.would_return"] == 0
+    assert inc["review_summary.rating_sums.staff"] == 4
+    # Repeated flags on one review count once
+    assert inc["review_summary.issues.a_b"] == 1
+
+    latest = update["$push"]["review_summary.latest"]
+    assert latest["$slice"] == review_summary.TOP_N
+    assert latest["$each"][0]["id"] == "r1"
+    assert latest["$each"][0]["photos"] == []
+
+
+def test_build_summary_counts_and_top_n_ordering():
+    reviews = [review(n, helpful=n % 3, issues=["loud"] if n % 2 else []) for n in range(8)]
+
+    summary = review_summary.build_summary(reviews)
+
+    assert summary["count"] == 8
+    assert summary["histogram"] == {"1": 0, "2": 0, "3": 0, "4": 8, "5": 0}
+    assert summary["issues"] == {"loud": 4}
+    assert [r["id"] for r in summary["latest"]] == ["r7", "r6", "r5", "r4", "r3"]
+    # Highest helpful_count first, newest first among ties
+    assert [r["id"] for r in summary["most_helpful"]] == ["r5", "r2", "r7", "r4", "r1"]
+    assert all(r["photos"] == [] for r in summary["latest"] + summary["most_helpful"])
+
+
+def test_build_summary_matches_applied_increments():
+    reviews = [review(1, overall=5.0), review(2, overall=2.25, would_return=False)]
+
+    summary = review_summary.build_summary(reviews)
+
+    assert summary["rating_sums"]["overall"] == 7.25
+    assert summary["would_return"] == 1
+    assert review_summary.average_rating(summary) == 3.6
+
+
+def test_present_summary_of_empty_summary_has_zero_averages():
+    presented = review_summary.present_summary(review_summary.empty_summary())
+
+    assert presented["total_reviews"] == 0
+    assert presented["average_rating"] == 0.0
+    assert presented["average_ratings"] == {name: 0.0 for name in review_summary.SUB_RATINGS}
+    assert presented["would_return_percent"] == 0.0
+    assert presented["latest_reviews"] == []
+    assert presented["most_helpful_reviews"] == []
+
+
+def test_present_summary_averages():
+    presented = review_summary.present_summary(review_summary.build_summary([review(1), review(2, would_return=False)]))
+
+    assert presented["average_rating"] == 4.0
+    assert presented["average_ratings"]["staff"] == 4.0
+    assert presented["would_return_percent"] == 50.0
+    assert [r["id"] for r in presented["latest_reviews"]] == ["r2", "r1"]
@@ -0,0 +1,88 @@
+"""Unit tests for backend/single_flight.py."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from single_flight import SingleFlight  # noqa: E402
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def query():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return ["result"]
+
+        results = await asyncio.gather(*[flight.do("key", query) for _ in range(10)])
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"calls": 1, "shared": 9, "in_flight": 0}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def query(key):
+            calls.append(key)
+            await asyncio.sleep(0)
+            return key
+
+        await asyncio.gather(flight.do("a", lambda: query("a")), flight.do("b", lambda: query("b")))
+        await flight.do("a", lambda: query("a"))
+        return calls
+
+    assert sorted(asyncio.run(scenario())) == ["a", "a", "b"]
+
+
+def test_error_is_shared_and_not_cached():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+
+        async def ok():
+            return 1
+
+        return results, await flight.do("k", ok)
+
+    results, retried = asyncio.run(scenario())
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert retried == 1
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def query():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", query))
+        second = asyncio.ensure_future(flight.do("k", query))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
@@ -0,0 +1,25 @@
+"""Cold start regression tests for the backend."""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("uvicorn")
+
+import startup_profile  # noqa: E402
+
+# Generous enough for a cold container; tighten once CI numbers settle
+COLD_START_BUDGET_SECONDS = float(os.environ.get("COLD_START_BUDGET_SECONDS", "5.0"))
+
+
+def test_heavy_modules_not_imported_at_startup():
+    assert startup_profile.loaded_modules() == []
+
+
+def test_cold_start_to_first_response_within_budget():
+    result = startup_profile.measure_cold_start()
+    assert result["cold_start_s"] < COLD_START_BUDGET_SECONDS, result